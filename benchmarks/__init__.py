@@ -0,0 +1,4 @@
+"""
+SkipAudioMaker 性能基准
+运行方式: python -m benchmarks.<模块名>
+"""
@@ -0,0 +1,111 @@
+"""
+样本解码基准：libsndfile 直接读取 vs pydub 回退路径 vs 旧版 load_sample，按格式分别计时
+
+合成 48kHz 立体声样本并以多种格式写入临时目录，解码为 44.1kHz 单声道float32。
+新旧路径都可用时给出结果的最大差异（重采样实现不同，差异应很小）。
+没有 ffmpeg 时 pydub 只能读取 WAV，其他格式显示为不可用。
+
+运行: python -m benchmarks.bench_decode [--duration 秒] [--repeats 次数]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import warnings
+import numpy as np
+import soundfile as sf
+from pydub import AudioSegment
+from core.decoder import decode_file, DECODER_SOUNDFILE, DECODER_PYDUB
+from core.pcm import segment_to_array
+from . import synthetic
+
+# (名称, 扩展名, soundfile 格式, 子类型)
+FORMATS = [
+    ('WAV 16-bit', 'wav', 'WAV', 'PCM_16'),
+    ('WAV 24-bit', 'wav', 'WAV', 'PCM_24'),
+    ('WAV float', 'wav', 'WAV', 'FLOAT'),
+    ('FLAC', 'flac', 'FLAC', 'PCM_16'),
+    ('OGG Vorbis', 'ogg', 'OGG', 'VORBIS'),
+    ('MP3', 'mp3', 'MP3', 'MPEG_LAYER_III'),
+]
+
+
+def write_corpus(workdir, duration, source_rate=48000):
+    """写入各格式的测试文件，返回 [(名称, 路径)]，当前 libsndfile 不支持写入的格式会跳过"""
+    left = synthetic.make_sample_array(duration, source_rate, 261.63)
+    right = synthetic.make_sample_array(duration, source_rate, 329.63)
+    stereo = np.stack([left, right], axis=1)
+    corpus = []
+    for label, ext, fmt, subtype in FORMATS:
+        path = os.path.join(workdir, f"{label.replace(' ', '_')}.{ext}")
+        try:
+            sf.write(path, stereo, source_rate, format=fmt, subtype=subtype)
+        except Exception as e:
+            print(f"跳过 {label}: {e}", file=sys.stderr)
+            continue
+        corpus.append((label, path))
+    return corpus
+
+
+def legacy_decode(path, sample_rate):
+    """旧版 load_sample：pydub 解码后用 set_frame_rate/set_channels 转换"""
+    audio = AudioSegment.from_file(path)
+    if audio.frame_rate != sample_rate:
+        audio = audio.set_frame_rate(sample_rate)
+    if audio.channels > 1:
+        audio = audio.set_channels(1)
+    return segment_to_array(audio)
+
+
+def time_decoder(func, repeats):
+    """返回 (中位耗时, 结果)，解码失败时返回 (None, 错误信息)"""
+    try:
+        result = func()
+    except Exception as e:
+        return None, str(e)
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="样本解码基准")
+    parser.add_argument('--duration', type=float, default=5.0, help="样本时长（秒）")
+    parser.add_argument('--sample-rate', type=int, default=44100, help="目标采样率")
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args(argv)
+    warnings.filterwarnings('ignore')
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        corpus = write_corpus(workdir, args.duration)
+        print(f"{'格式':<12} {'soundfile(ms)':>14} {'pydub回退(ms)':>14} {'旧版(ms)':>10} "
+              f"{'加速比':>8} {'最大差异':>10}")
+        for label, path in corpus:
+            rate = args.sample_rate
+            fast_time, fast = time_decoder(
+                lambda: decode_file(path, rate, DECODER_SOUNDFILE)[0], args.repeats)
+            fallback_time, _ = time_decoder(
+                lambda: decode_file(path, rate, DECODER_PYDUB)[0], args.repeats)
+            legacy_time, legacy = time_decoder(lambda: legacy_decode(path, rate), args.repeats)
+            
+            def text(seconds):
+                return f"{seconds * 1000:.2f}" if seconds is not None else "不可用"
+            
+            if fast_time is not None and legacy_time is not None:
+                length = min(len(fast), len(legacy))
+                diff = float(np.max(np.abs(fast[:length] - legacy[:length]))) if length else 0.0
+                ratio = f"{legacy_time / fast_time:.1f}x"
+                diff_text = f"{diff:.2e}"
+            else:
+                ratio = diff_text = "-"
+            print(f"{label:<12} {text(fast_time):>14} {text(fallback_time):>14} "
+                  f"{text(legacy_time):>10} {ratio:>8} {diff_text:>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
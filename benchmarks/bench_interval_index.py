@@ -0,0 +1,46 @@
+"""
+时间区间查询基准：IntervalIndex vs 全表扫描（与 NoteTable.select 相同的条件）
+
+对随机时间窗做重叠查询并校验两者结果一致。
+
+运行: python -m benchmarks.bench_interval_index
+"""
+import sys
+import time
+import numpy as np
+from core.note_table import NoteTable
+from core.interval_index import IntervalIndex
+from . import synthetic
+
+
+def main(argv=None):
+    rng = np.random.default_rng(0)
+    print(f"{'音符数':>8} {'建索引(ms)':>11} {'扫描(us/次)':>12} {'索引(us/次)':>12} {'加速比':>8}  一致")
+    mismatches = 0
+    for count in (10000, 100000, 1000000):
+        duration = count / 50
+        table = NoteTable.from_dicts(synthetic.make_notes(count, notes_per_second=50, duration=0.5))
+        windows = [(t0, t0 + rng.exponential(2.0)) for t0 in rng.uniform(0, duration, 200)]
+        
+        start = time.perf_counter()
+        index = IntervalIndex.from_notes(table)
+        build_time = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        expected = [np.flatnonzero((table['end_sec'] > t0) & (table['start_sec'] < t1))
+                    for t0, t1 in windows]
+        scan_time = (time.perf_counter() - start) / len(windows)
+        
+        start = time.perf_counter()
+        results = [index.overlap(t0, t1) for t0, t1 in windows]
+        index_time = (time.perf_counter() - start) / len(windows)
+        
+        same = all(np.array_equal(a, b) for a, b in zip(expected, results))
+        mismatches += not same
+        print(f"{count:>8} {build_time * 1000:>11.2f} {scan_time * 1e6:>12.1f} "
+              f"{index_time * 1e6:>12.1f} {scan_time / index_time:>7.1f}x  {'是' if same else '否'}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
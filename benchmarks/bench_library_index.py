@@ -0,0 +1,89 @@
+"""
+样本库索引基准：首次扫描、无变化重扫、少量文件修改后的增量重扫以及过滤查询
+
+在临时目录中生成若干子目录的短样本（不同音高），全部使用 libsndfile 可读的 WAV。
+
+运行: python -m benchmarks.bench_library_index [--files 数量] [--changed 比例]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import warnings
+import numpy as np
+import soundfile as sf
+from core.library_index import LibraryIndex
+from . import synthetic
+
+SAMPLE_RATE = 44100
+
+
+def write_library(workdir, count, folders=20, duration=0.3):
+    """写入 count 个样本，平均分到 folders 个子目录，返回文件路径列表"""
+    paths = []
+    for i in range(count):
+        folder = os.path.join(workdir, f"pack_{i % folders:02d}")
+        os.makedirs(folder, exist_ok=True)
+        pitch = 36 + i % 48
+        frequency = 440.0 * 2 ** ((pitch - 69) / 12)
+        path = os.path.join(folder, f"one_shot_{i:05d}_{pitch}.wav")
+        sf.write(path, synthetic.make_sample_array(duration, SAMPLE_RATE, frequency), SAMPLE_RATE)
+        paths.append(path)
+    return paths
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="样本库索引基准")
+    parser.add_argument('--files', type=int, default=2000, help="样本数量")
+    parser.add_argument('--changed', type=float, default=0.01, help="修改的文件比例")
+    parser.add_argument('--workers', type=int, default=4, help="分析线程数")
+    args = parser.parse_args(argv)
+    warnings.filterwarnings('ignore')
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        library = os.path.join(workdir, 'library')
+        paths = write_library(library, args.files)
+        index = LibraryIndex(os.path.join(workdir, 'index', 'library.sqlite'))
+        # 预热 librosa，避免首次导入计入扫描时间
+        index.analyze(paths[0])
+        
+        full_time, full = timed(index.scan, library, workers=args.workers)
+        same_time, same = timed(index.scan, library, workers=args.workers)
+        rng = np.random.default_rng(0)
+        touched = rng.choice(paths, max(1, int(len(paths) * args.changed)), replace=False)
+        for path in touched:
+            os.utime(path, ns=(time.time_ns(), time.time_ns()))
+        incremental_time, incremental = timed(index.scan, library, workers=args.workers)
+        
+        print(f"样本数: {len(paths)}，数据库: {index.stats()['db_bytes'] / 1024:.0f} KB")
+        print(f"首次扫描: {full_time:.3f}s（分析 {full['added']} 个）")
+        print(f"无变化重扫: {same_time * 1000:.1f} ms（未变化 {same['unchanged']} 个）")
+        print(f"修改 {len(touched)} 个后重扫: {incremental_time * 1000:.1f} ms"
+              f"（重新分析 {incremental['updated']} 个）")
+        
+        queries = [
+            ('名称包含 "_00"', dict(text='_00')),
+            ('根音 C4', dict(root_pitch=60)),
+            ('根音 C3-B3 且时长>=0.2s', dict(root_pitch=(48, 59), min_duration=0.2)),
+            ('单个目录，按时长排序', dict(folder=os.path.join(library, 'pack_03'),
+                                      order_by='duration')),
+        ]
+        for label, kwargs in queries:
+            times = []
+            for _ in range(20):
+                elapsed, rows = timed(index.query, **kwargs)
+                times.append(elapsed)
+            print(f"查询 {label}: {np.median(times) * 1000:.2f} ms，{len(rows)} 条")
+        index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
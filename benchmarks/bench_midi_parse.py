@@ -0,0 +1,113 @@
+"""
+MIDI 解析基准：按 (音轨, 通道, 音高) 队列配对 vs 旧版线性扫描配对
+
+同时校验新实现与旧实现在合成语料（以及命令行传入的 MIDI 文件）上的输出一致。
+
+运行: python -m benchmarks.bench_midi_parse [额外的.mid文件...]
+"""
+import os
+import sys
+import time
+import tempfile
+from collections import defaultdict
+import mido
+from core.midi_processor import MidiProcessor
+from . import synthetic
+
+
+def legacy_load_midi(file_path):
+    """旧版 load_midi 的配对逻辑：每个 note_off 从头扫描同音高的音符列表"""
+    notes = defaultdict(list)
+    max_time = 0
+    mid = mido.MidiFile(file_path)
+    for track in mid.tracks:
+        # 时间按音轨独立累计（与当前解析器一致），只比较配对逻辑
+        current_time = 0
+        for msg in track:
+            current_time += msg.time
+            max_time = max(max_time, current_time)
+            if msg.type == 'note_on' and msg.velocity > 0:
+                notes[msg.note].append({
+                    'note': msg.note,
+                    'velocity': msg.velocity,
+                    'start': current_time,
+                    'end': None,
+                    'channel': msg.channel
+                })
+            elif msg.type == 'note_off' or (msg.type == 'note_on' and msg.velocity == 0):
+                for note in notes[msg.note]:
+                    if (note['end'] is None and
+                            note['channel'] == msg.channel and
+                            note['start'] <= current_time):
+                        note['end'] = current_time
+                        break
+    for note_list in notes.values():
+        for note in note_list:
+            if note['end'] is None:
+                note['end'] = max_time
+    return notes
+
+
+def make_stacked_midi(file_path, note_count, stack=4, step=60):
+    """单音轨、单通道、少量音高的重叠音符（black MIDI 式的同音高密集事件）"""
+    mid = mido.MidiFile(type=0, ticks_per_beat=synthetic.TICKS_PER_BEAT)
+    track = mido.MidiTrack()
+    events = []
+    for i in range(note_count):
+        pitch = 60 + i % 2
+        start = i * step
+        events.append((start, 1, pitch))
+        events.append((start + step * stack, 0, pitch))  # 与后续同音高音符重叠
+    events.sort()
+    last = 0
+    for tick, is_on, pitch in events:
+        kind = 'note_on' if is_on else 'note_off'
+        track.append(mido.Message(kind, note=pitch, velocity=100 if is_on else 0, time=tick - last))
+        last = tick
+    mid.tracks.append(track)
+    mid.save(file_path)
+
+
+def pairing(notes):
+    """提取 (音高, 通道, 开始, 结束) 用于比较配对结果"""
+    return sorted(
+        (note['note'], note['channel'], note['start'], note['end'])
+        for note_list in notes.values() for note in note_list
+    )
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main(argv=None):
+    extra_files = list(argv if argv is not None else sys.argv[1:])
+    with tempfile.TemporaryDirectory() as workdir:
+        corpus = []
+        for count in (2000, 5000, 10000, 20000):
+            path = os.path.join(workdir, f'stacked_{count}.mid')
+            make_stacked_midi(path, count)
+            corpus.append((f'同音高重叠 {count}', path))
+        for polyphony in (1, 4, 16):
+            path = os.path.join(workdir, f'poly_{polyphony}.mid')
+            synthetic.make_midi(path, note_count=5000, polyphony=polyphony,
+                                duration_sec=120, tempo_changes=3)
+            corpus.append((f'合成 5000 音符/{polyphony} 声部', path))
+        corpus.extend((os.path.basename(path), path) for path in extra_files)
+        
+        print(f"{'文件':<26} {'旧版(s)':>10} {'新版(s)':>10} {'加速比':>8}  一致")
+        mismatches = 0
+        for label, path in corpus:
+            legacy_time, legacy_notes = timed(legacy_load_midi, path)
+            new_time, new_notes = timed(MidiProcessor().load_midi, path)
+            same = pairing(legacy_notes) == pairing(new_notes)
+            mismatches += not same
+            print(f"{label:<26} {legacy_time:>10.3f} {new_time:>10.3f} "
+                  f"{legacy_time / new_time:>7.1f}x  {'是' if same else '否'}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
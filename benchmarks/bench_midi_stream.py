@@ -0,0 +1,80 @@
+"""
+MIDI 流式解析基准：MidiProcessor.iter_notes vs load_midi + get_note_list
+
+比较总耗时、首个音符的延迟和峰值内存（tracemalloc），并校验两者生成的音符完全一致。
+
+运行: python -m benchmarks.bench_midi_stream [额外的.mid文件...]
+"""
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+from core.midi_processor import MidiProcessor
+from . import synthetic
+
+
+def full_parse(path):
+    """完整解析，返回 (音符字典列表, 首个音符延迟)"""
+    start = time.perf_counter()
+    midi_processor = MidiProcessor()
+    midi_processor.load_midi(path)
+    notes = midi_processor.get_note_list().to_dicts()
+    return notes, time.perf_counter() - start
+
+
+def stream_parse(path, keep=True):
+    """流式解析，返回 (音符字典列表或音符数, 首个音符延迟)"""
+    start = time.perf_counter()
+    first = None
+    notes = [] if keep else 0
+    for note in MidiProcessor().iter_notes(path):
+        if first is None:
+            first = time.perf_counter() - start
+        if keep:
+            notes.append(note)
+        else:
+            notes += 1
+    return notes, first or 0.0
+
+
+def profile(func, *args):
+    """返回 (结果, 总耗时, 峰值字节数)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main(argv=None):
+    extra_files = list(argv if argv is not None else sys.argv[1:])
+    with tempfile.TemporaryDirectory() as workdir:
+        corpus = []
+        for count in (5000, 20000, 50000):
+            path = os.path.join(workdir, f'synthetic_{count}.mid')
+            synthetic.make_midi(path, note_count=count, polyphony=8,
+                                duration_sec=count / 50, tempo_changes=5)
+            corpus.append((f'合成 {count} 音符', path))
+        corpus.extend((os.path.basename(path), path) for path in extra_files)
+        
+        print(f"{'文件':<20} {'完整(s)':>9} {'流式(s)':>9} {'首音符(ms)':>11} "
+              f"{'完整峰值(MB)':>13} {'流式峰值(MB)':>13}  一致")
+        mismatches = 0
+        for label, path in corpus:
+            (full_notes, _), full_time, full_peak = profile(full_parse, path)
+            (stream_notes, first), _, _ = profile(stream_parse, path)
+            # 不保留音符时的峰值才反映流式消费（边解析边渲染）的内存占用
+            _, stream_time, stream_peak = profile(stream_parse, path, False)
+            same = full_notes == stream_notes
+            mismatches += not same
+            print(f"{label:<20} {full_time:>9.3f} {stream_time:>9.3f} {first * 1000:>11.2f} "
+                  f"{full_peak / 1024 / 1024:>13.2f} {stream_peak / 1024 / 1024:>13.2f}  "
+                  f"{'是' if same else '否'}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
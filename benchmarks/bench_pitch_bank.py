@@ -0,0 +1,71 @@
+"""
+移调样本库基准：逐音符渲染 vs 预渲染不重复的 (样本, 音高, 效果) 后切片混音
+
+逐音符路径依赖移调缓存去重，但颤音等效果仍按音符重复计算；
+样本库路径每个组合只渲染一次。两者的输出应完全一致。
+
+运行: python -m benchmarks.bench_pitch_bank [--notes 数量]
+"""
+import sys
+import time
+import argparse
+import warnings
+import numpy as np
+from core.audio_processor import AudioProcessor
+from core.mixer import MixBus
+from .synthetic import make_notes, make_sample_array
+
+SAMPLE_RATE = 44100
+
+
+def legacy_render(processor, notes, samples, effects_map):
+    """旧版做法：每个音符单独渲染后叠加"""
+    song_end = max(note['end_sec'] for note in notes)
+    bus = MixBus(int(np.ceil(song_end * SAMPLE_RATE)), SAMPLE_RATE)
+    converted = {}
+    for note in notes:
+        sample, effects = processor._resolve_note(note, samples, effects_map)
+        processed = processor._render_resolved(note, sample, effects, converted)
+        length = processor.note_length(note['duration_sec'])
+        bus.add(processed[:length], int(round(note['start_sec'] * SAMPLE_RATE)), length)
+    return bus.to_array()
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="移调样本库基准")
+    parser.add_argument('--notes', type=int, default=2000, help="音符数量")
+    args = parser.parse_args(argv)
+    warnings.filterwarnings('ignore')
+    
+    samples = {'default': make_sample_array(0.5, SAMPLE_RATE)}
+    # 每个音高都带颤音，逐音符路径会重复计算效果
+    effects_map = {pitch: {'vibrato': {'rate': 5.0, 'depth': 0.3}} for pitch in range(128)}
+    notes = make_notes(args.notes, pitch_range=(48, 72))
+    
+    processor = AudioProcessor(SAMPLE_RATE)
+    # 预热移调缓存和 librosa，两条路径都只比较混音与效果开销
+    processor.build_pitch_bank(notes, samples, effects_map)
+    
+    legacy_time, legacy = timed(legacy_render, processor, notes, samples, effects_map)
+    plan_time, jobs = timed(processor.plan_pitch_bank, notes, samples, effects_map)
+    bank_time, bank = timed(processor.build_pitch_bank, notes, samples, effects_map)
+    mix_time, mixed = timed(processor.render_track_array, notes, samples, effects_map, bank)
+    total = plan_time + bank_time + mix_time
+    
+    print(f"音符数: {len(notes)}，不重复组合: {len(jobs)}，样本库内存: "
+          f"{bank.nbytes / 1024 / 1024:.1f} MB")
+    print(f"逐音符渲染: {legacy_time:.3f}s")
+    print(f"样本库: 计划 {plan_time:.3f}s + 预渲染 {bank_time:.3f}s + 混音 {mix_time:.3f}s "
+          f"= {total:.3f}s（{legacy_time / total:.1f}x）")
+    print(f"输出一致: {np.array_equal(legacy, mixed)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
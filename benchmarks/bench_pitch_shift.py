@@ -0,0 +1,46 @@
+"""
+移调单音符开销基准：比较 varispeed 与 phase-vocoder 两种质量模式
+
+运行: python -m benchmarks.bench_pitch_shift
+"""
+import time
+from core.audio_processor import AudioProcessor, QUALITY_MODES
+from core.pitch_cache import PitchShiftCache
+from .synthetic import make_sample
+
+SAMPLE_RATE = 44100
+SAMPLE_LENGTHS = [0.25, 0.5, 1.0, 2.0]  # 秒
+SEMITONES = [-7, -2, 3, 12]
+REPEATS = 5
+
+
+def per_note_ms(processor, sample):
+    """平均每次移调耗时（毫秒）"""
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        for semitones in SEMITONES:
+            processor.pitch_shift(sample, semitones)
+    return (time.perf_counter() - start) / (REPEATS * len(SEMITONES)) * 1000
+
+
+def main():
+    # 关闭缓存，测量真实计算开销
+    processors = {
+        mode: AudioProcessor(SAMPLE_RATE, pitch_cache=PitchShiftCache(max_bytes=0), quality=mode)
+        for mode in QUALITY_MODES
+    }
+    for processor in processors.values():
+        processor.pitch_shift(make_sample(0.1, SAMPLE_RATE), 1)  # 预热
+
+    header = ''.join(f"{mode + '(ms)':>20}" for mode in QUALITY_MODES)
+    print(f"{'样本长度(s)':>10}{header}{'加速比':>10}")
+    for duration in SAMPLE_LENGTHS:
+        sample = make_sample(duration, SAMPLE_RATE)
+        costs = {mode: per_note_ms(processor, sample) for mode, processor in processors.items()}
+        row = ''.join(f"{costs[mode]:>20.3f}" for mode in QUALITY_MODES)
+        speedup = costs['phase-vocoder'] / costs['varispeed']
+        print(f"{duration:>10.2f}{row}{speedup:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+播放引擎基准：开始播放前的等待时间和实时输出时的欠载
+
+旧版播放需要先把整首歌渲染成临时 WAV；播放引擎在第一块渲染完成后即可输出。
+使用 NullSink 按声卡节奏拉取数据，统计不同缓冲区大小下的欠载次数。
+
+运行: python -m benchmarks.bench_playback [--notes 数量] [--seconds 播放秒数]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import warnings
+from core.audio_processor import AudioProcessor
+from core.pitch_cache import PitchShiftCache
+from core.playback import PlaybackEngine, NullSink
+from .synthetic import make_notes, make_sample
+
+SAMPLE_RATE = 44100
+
+
+def legacy_start(notes, samples):
+    """旧版做法：完整渲染到临时文件后才能交给播放器，返回等待时间"""
+    processor = AudioProcessor(SAMPLE_RATE, pitch_cache=PitchShiftCache())
+    with tempfile.TemporaryDirectory() as workdir:
+        start = time.perf_counter()
+        processor.render_to_wav(os.path.join(workdir, 'play.wav'), notes, samples)
+        return time.perf_counter() - start
+
+
+def engine_run(notes, samples, buffer_sec, seconds):
+    """用 NullSink 实时播放 seconds 秒，返回 (第一块延迟, 欠载次数, 欠载帧数)"""
+    processor = AudioProcessor(SAMPLE_RATE, pitch_cache=PitchShiftCache())
+    engine = PlaybackEngine(processor, NullSink(SAMPLE_RATE, block_frames=512),
+                            buffer_sec=buffer_sec)
+    engine.play(notes, samples)
+    time.sleep(seconds)
+    stats = engine.stats()
+    engine.stop()
+    return stats['first_block_latency'], stats['underruns'], stats['underrun_frames']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="播放引擎基准")
+    parser.add_argument('--notes', type=int, default=2000, help="音符数量（每秒8个）")
+    parser.add_argument('--seconds', type=float, default=5.0, help="每种缓冲区大小播放的秒数")
+    args = parser.parse_args(argv)
+    warnings.filterwarnings('ignore')
+    
+    samples = {'default': make_sample(0.5, SAMPLE_RATE)}
+    notes = make_notes(args.notes)
+    # 预热 librosa/numba，避免首轮计入JIT编译时间
+    AudioProcessor(SAMPLE_RATE).render_track(make_notes(4), samples)
+    
+    print(f"音符数: {len(notes)}，歌曲时长: {notes[-1]['end_sec']:.1f}s")
+    print(f"旧版（完整渲染后播放）等待: {legacy_start(notes, samples):.3f}s")
+    print(f"{'缓冲区(s)':>10} {'第一块延迟(ms)':>16} {'欠载次数':>10} {'欠载帧数':>10}")
+    for buffer_sec in (0.1, 0.5, 2.0):
+        latency, underruns, frames = engine_run(notes, samples, buffer_sec, args.seconds)
+        latency_text = f"{latency * 1000:.1f}" if latency is not None else "-"
+        print(f"{buffer_sec:>10.1f} {latency_text:>16} {underruns:>10} {frames:>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
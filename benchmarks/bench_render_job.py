@@ -0,0 +1,98 @@
+"""
+后台渲染任务基准：渲染期间主线程的最长停顿、进度回调的开销和取消响应时间
+
+旧版在界面线程中直接渲染，整个渲染期间界面无法响应；RenderJob 在工作线程中运行，
+主线程每 10ms 处理一次“事件”，统计两次事件之间的最长间隔。
+
+运行: python -m benchmarks.bench_render_job [--notes 数量]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+import warnings
+from core.audio_processor import AudioProcessor
+from core.render_job import RenderJob, RenderCancelled, JOB_CANCELLED
+from .synthetic import make_notes, make_sample
+
+SAMPLE_RATE = 44100
+TICK = 0.01  # 模拟界面事件循环的间隔
+
+
+def heartbeat_while(thread):
+    """线程运行期间每 TICK 秒醒来一次，返回两次醒来之间的最长间隔"""
+    longest = 0.0
+    last = time.perf_counter()
+    while thread.is_alive():
+        time.sleep(TICK)
+        now = time.perf_counter()
+        longest = max(longest, now - last)
+        last = now
+    return longest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="后台渲染任务基准")
+    parser.add_argument('--notes', type=int, default=4000, help="音符数量")
+    args = parser.parse_args(argv)
+    warnings.filterwarnings('ignore')
+    
+    samples = {'default': make_sample(0.5, SAMPLE_RATE)}
+    notes = make_notes(args.notes)
+    processor = AudioProcessor(SAMPLE_RATE)
+    # 预热移调缓存，只比较混音和写入
+    processor.render_track(notes[:50], samples)
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'out.wav')
+        
+        start = time.perf_counter()
+        processor.render_to_file(path, notes, samples)
+        blocking = time.perf_counter() - start
+        print(f"界面线程直接渲染: 界面停顿 {blocking * 1000:.0f} ms")
+        
+        reports = []
+        job = RenderJob(path, notes, samples)
+        thread = threading.Thread(target=job.run, args=(processor, reports.append))
+        start = time.perf_counter()
+        thread.start()
+        longest = heartbeat_while(thread)
+        total = time.perf_counter() - start
+        print(f"后台 RenderJob: 总耗时 {total * 1000:.0f} ms，界面最长停顿 {longest * 1000:.1f} ms，"
+              f"进度回调 {len(reports)} 次")
+        
+        job = RenderJob(path, notes, samples)
+        start = time.perf_counter()
+        job.run(processor, on_progress=lambda job: None, progress_interval=0)
+        print(f"每个音符都回调进度: {(time.perf_counter() - start) * 1000:.0f} ms")
+        
+        job = RenderJob(path, notes, samples)
+        cancelled_at = []
+        
+        def cancel_later():
+            time.sleep(blocking / 2)
+            cancelled_at.append(time.perf_counter())
+            job.cancel()
+        
+        canceller = threading.Thread(target=cancel_later)
+        canceller.start()
+        try:
+            job.run(processor)
+        except RenderCancelled:
+            pass
+        finished_at = time.perf_counter()
+        canceller.join()
+        if job.state != JOB_CANCELLED:
+            # 音符太少时取消前已经渲染完成
+            print(f"取消响应: 取消前已完成（{job.total_notes} 个音符）")
+            return 0
+        response = finished_at - cancelled_at[0]
+        print(f"取消响应: {response * 1000:.1f} ms（完成 {job.notes_done}/{job.total_notes} 个音符，"
+              f"未完成的文件已删除: {not os.path.exists(path)}）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+render_track 混音基准：验证渲染时间随音符数量线性增长
+
+运行: python -m benchmarks.bench_render_track
+"""
+import time
+import numpy as np
+from pydub import AudioSegment
+from core.audio_processor import AudioProcessor
+from core.mixer import MixBus
+from core.pcm import segment_to_array
+from .synthetic import make_notes, make_sample
+
+SAMPLE_RATE = 44100
+NOTE_COUNTS = [250, 500, 1000, 2000, 4000]
+NOTES_PER_SECOND = 8  # 固定音符密度，歌曲长度随音符数量增长
+
+
+def legacy_mix(notes, note_audio):
+    """旧版做法：每个起始时间补齐静音后调用一次 AudioSegment.overlay"""
+    track = AudioSegment.silent(duration=0, frame_rate=SAMPLE_RATE)
+    for note in notes:
+        position = note['start_sec'] * 1000
+        end = position + len(note_audio)
+        if len(track) < end:
+            track += AudioSegment.silent(duration=end - len(track), frame_rate=SAMPLE_RATE)
+        # overlay 每次都会复制整条音轨
+        track = track.overlay(note_audio, position=position)
+    return track
+
+
+def bus_mix(notes, note_audio):
+    """MixBus 混音"""
+    song_end = max(note['end_sec'] for note in notes)
+    bus = MixBus(int(np.ceil(song_end * SAMPLE_RATE)), SAMPLE_RATE)
+    samples = segment_to_array(note_audio)
+    for note in notes:
+        bus.add(samples, int(round(note['start_sec'] * SAMPLE_RATE)))
+    return bus.to_segment()
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    note_audio = make_sample(0.2, SAMPLE_RATE)
+    processor = AudioProcessor(SAMPLE_RATE)
+    sample = make_sample(0.3, SAMPLE_RATE)
+    samples = {'default': sample}
+    # 预热 librosa/numba，避免首轮计入JIT编译时间
+    processor.render_track(make_notes(4), samples)
+
+    print(f"{'音符数':>8} {'overlay(s)':>12} {'MixBus(s)':>12} {'render_track(s)':>16} {'每音符(ms)':>12}")
+    for count in NOTE_COUNTS:
+        notes = make_notes(count, NOTES_PER_SECOND)
+        legacy = timed(legacy_mix, notes, note_audio) if count <= 2000 else float('nan')
+        bus = timed(bus_mix, notes, note_audio)
+        full = timed(processor.render_track, notes, samples)
+        print(f"{count:>8} {legacy:>12.3f} {bus:>12.4f} {full:>16.3f} {full / count * 1000:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
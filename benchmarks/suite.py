@@ -0,0 +1,200 @@
+"""
+渲染与解析热路径的基准套件
+
+对每个阶段测量耗时（中位数/最小值）和峰值内存（tracemalloc），
+结果以 JSON 输出，并可与保存的基线比较，超出容差时返回非零退出码。
+
+运行:
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --save-baseline baseline.json
+    python -m benchmarks.suite --baseline baseline.json --tolerance 0.2
+"""
+import os
+import sys
+import json
+import time
+import platform
+import tempfile
+import argparse
+import tracemalloc
+import warnings
+import numpy as np
+from core.midi_processor import MidiProcessor
+from core.audio_processor import AudioProcessor, QUALITY_MODES, QUALITY_PHASE_VOCODER
+from core.pitch_cache import PitchShiftCache
+from core.effects import apply_vibrato, apply_glide
+from . import synthetic
+
+
+def measure(func, repeats=3):
+    """
+    测量单个阶段
+    
+    第一次调用在 tracemalloc 下运行以记录峰值内存（同时充当预热），
+    之后的调用只计时。
+    """
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {
+        'median_sec': float(np.median(times)),
+        'min_sec': float(min(times)),
+        'repeats': repeats,
+        'peak_bytes': int(peak)
+    }
+
+
+def build_stages(params, workdir):
+    """根据参数构建各阶段的可调用对象"""
+    sample_rate = params['sample_rate']
+    quality = params['quality']
+    midi_path = os.path.join(workdir, 'bench.mid')
+    synthetic.make_midi(
+        midi_path,
+        note_count=params['notes'],
+        polyphony=params['polyphony'],
+        duration_sec=params['duration'],
+        tempo_changes=params['tempo_changes']
+    )
+    
+    midi_processor = MidiProcessor()
+    midi_processor.load_midi(midi_path)
+    notes = midi_processor.get_note_list()
+    sample = synthetic.make_sample(params['sample_length'], sample_rate)
+    samples = {'default': sample}
+    note = {'note': 67, 'duration_sec': params['sample_length']}
+    
+    # 移调与单音符阶段关闭缓存，测量真实计算开销
+    uncached = AudioProcessor(sample_rate, pitch_cache=PitchShiftCache(max_bytes=0), quality=quality)
+    
+    def render_track():
+        # 每次使用新的处理器，缓存从空开始
+        AudioProcessor(sample_rate, quality=quality).render_track_array(notes, samples)
+    
+    return {
+        'load_midi': lambda: MidiProcessor().load_midi(midi_path),
+        'pitch_shift': lambda: uncached.pitch_shift(sample, 7),
+        'render_note': lambda: uncached.render_note(note, sample, {
+            'vibrato': {'rate': 5.0, 'depth': 0.5},
+            'glide': {'start': 60, 'end': 64}
+        }),
+        'apply_vibrato': lambda: apply_vibrato(sample, rate=5.0, depth=0.5),
+        'apply_glide': lambda: apply_glide(sample, start_pitch=55, end_pitch=67),
+        'render_track': render_track,
+    }, len(notes)
+
+
+def run(params, stages=None):
+    """运行基准并返回结果字典"""
+    with tempfile.TemporaryDirectory() as workdir:
+        stage_funcs, note_count = build_stages(params, workdir)
+        results = {}
+        for name, func in stage_funcs.items():
+            if stages and name not in stages:
+                continue
+            results[name] = measure(func, params['repeats'])
+            print(f"{name:>14}: {results[name]['median_sec'] * 1000:10.2f} ms  "
+                  f"峰值 {results[name]['peak_bytes'] / 1024 / 1024:8.2f} MB", file=sys.stderr)
+    
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'parsed_notes': note_count,
+            'params': params
+        },
+        'stages': results
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    与基线比较
+    
+    返回:
+        回退的阶段列表 [(阶段, 指标, 当前值, 基线值, 比例)]
+    """
+    regressions = []
+    for name, current in results['stages'].items():
+        base = baseline.get('stages', {}).get(name)
+        if not base:
+            continue
+        for metric in ('median_sec', 'peak_bytes'):
+            if base[metric] <= 0:
+                continue
+            ratio = current[metric] / base[metric]
+            if ratio > 1 + tolerance:
+                regressions.append((name, metric, current[metric], base[metric], ratio))
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="SkipAudioMaker 基准套件")
+    parser.add_argument('--notes', type=int, default=2000, help="合成 MIDI 音符数")
+    parser.add_argument('--polyphony', type=int, default=4, help="复音数")
+    parser.add_argument('--duration', type=float, default=60.0, help="歌曲时长（秒）")
+    parser.add_argument('--tempo-changes', type=int, default=4, help="速度变化次数")
+    parser.add_argument('--sample-length', type=float, default=0.5, help="样本长度（秒）")
+    parser.add_argument('--sample-rate', type=int, default=44100)
+    parser.add_argument('--quality', choices=QUALITY_MODES, default=QUALITY_PHASE_VOCODER)
+    parser.add_argument('--repeats', type=int, default=3, help="每阶段计时次数")
+    parser.add_argument('--stage', action='append', help="只运行指定阶段（可重复）")
+    parser.add_argument('--output', help="结果 JSON 输出路径（默认输出到标准输出）")
+    parser.add_argument('--baseline', help="要比较的基线 JSON")
+    parser.add_argument('--save-baseline', help="将本次结果保存为基线")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="允许的相对回退比例")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    warnings.filterwarnings('ignore')
+    params = {
+        'notes': args.notes,
+        'polyphony': args.polyphony,
+        'duration': args.duration,
+        'tempo_changes': args.tempo_changes,
+        'sample_length': args.sample_length,
+        'sample_rate': args.sample_rate,
+        'quality': args.quality,
+        'repeats': args.repeats
+    }
+    results = run(params, args.stage)
+    
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+    
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            f.write(text)
+    
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('meta', {}).get('params') != params:
+            print("警告: 基线参数与本次运行不同，比较结果可能无意义", file=sys.stderr)
+        regressions = compare(results, baseline, args.tolerance)
+        for name, metric, current, base, ratio in regressions:
+            print(f"性能回退 {name}.{metric}: {current:.6g} vs 基线 {base:.6g} ({ratio:.2f}x)",
+                  file=sys.stderr)
+        if regressions:
+            return 1
+        print("未发现超出容差的回退", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+基准测试用的合成数据：MIDI 文件、音符列表和样本
+"""
+import numpy as np
+import mido
+from core.pcm import array_to_segment
+
+TICKS_PER_BEAT = 480
+NOMINAL_TEMPO = 500000  # 120 BPM，用于把目标时长换算为tick
+
+
+def make_midi(file_path, note_count=1000, polyphony=4, duration_sec=60.0,
+              tempo_changes=0, pitch_range=(48, 72), seed=0):
+    """
+    生成合成 MIDI 文件（type 1，第0轨为速度轨，每个声部一条音轨）
+    
+    参数:
+        file_path: 输出路径
+        note_count: 音符总数
+        polyphony: 同时发声的声部数
+        duration_sec: 按 120 BPM 估算的歌曲时长
+        tempo_changes: 速度变化次数
+        pitch_range: 音高范围 [low, high)
+        seed: 随机种子
+    
+    返回:
+        实际写入的音符数
+    """
+    rng = np.random.default_rng(seed)
+    mid = mido.MidiFile(type=1, ticks_per_beat=TICKS_PER_BEAT)
+    total_ticks = int(duration_sec * 1_000_000 / NOMINAL_TEMPO * TICKS_PER_BEAT)
+    
+    # 速度轨
+    tempo_track = mido.MidiTrack()
+    tempo_track.append(mido.MetaMessage('set_tempo', tempo=NOMINAL_TEMPO, time=0))
+    if tempo_changes:
+        change_ticks = np.linspace(0, total_ticks, tempo_changes + 2)[1:-1].astype(int)
+        last = 0
+        for tick in change_ticks:
+            bpm = rng.uniform(80, 180)
+            tempo_track.append(mido.MetaMessage(
+                'set_tempo', tempo=int(60_000_000 / bpm), time=int(tick - last)
+            ))
+            last = tick
+    mid.tracks.append(tempo_track)
+    
+    # 每个声部内音符首尾相接，声部之间重叠形成复音
+    written = 0
+    for voice in range(polyphony):
+        count = note_count // polyphony + (1 if voice < note_count % polyphony else 0)
+        if count == 0:
+            continue
+        track = mido.MidiTrack()
+        slot = max(total_ticks // count, 2)
+        pitches = rng.integers(pitch_range[0], pitch_range[1], count)
+        lengths = rng.integers(slot // 2, slot + 1, count)
+        channel = voice % 16
+        gap = voice * slot // max(polyphony, 1)  # 声部错开起始时间
+        for pitch, length in zip(pitches, lengths):
+            track.append(mido.Message('note_on', note=int(pitch), velocity=100,
+                                      channel=channel, time=int(gap)))
+            track.append(mido.Message('note_off', note=int(pitch), velocity=0,
+                                      channel=channel, time=int(length)))
+            gap = slot - length
+            written += 1
+        mid.tracks.append(track)
+    
+    mid.save(file_path)
+    return written
+
+
+def make_notes(count, notes_per_second=8, duration=0.2, pitch_range=(48, 72), seed=0):
+    """生成固定密度的音符字典列表（与 MidiProcessor.get_note_list 格式一致）"""
+    rng = np.random.default_rng(seed)
+    notes = []
+    for i in range(count):
+        start = i / notes_per_second
+        notes.append({
+            'note': int(rng.integers(pitch_range[0], pitch_range[1])),
+            'velocity': 100,
+            'start_sec': start,
+            'duration_sec': duration,
+            'end_sec': start + duration
+        })
+    return notes
+
+
+def make_sample_array(duration=0.5, sample_rate=44100, frequency=261.63):
+    """生成带泛音和衰减包络的float32样本"""
+    t = np.arange(int(sample_rate * duration)) / sample_rate
+    wave = 0.3 * np.sin(2 * np.pi * frequency * t) + 0.1 * np.sin(4 * np.pi * frequency * t)
+    return (wave * np.exp(-2 * t)).astype(np.float32)
+
+
+def make_sample(duration=0.5, sample_rate=44100, frequency=261.63):
+    """生成合成样本 AudioSegment"""
+    return array_to_segment(make_sample_array(duration, sample_rate, frequency), sample_rate)
@@ -6,5 +6,20 @@ from .midi_processor import MidiProcessor
 from .audio_processor import AudioProcessor
 from .effects import apply_vibrato, apply_glide
 from .project import Project
+from .pitch_cache import PitchShiftCache
+from .sample_cache import SampleCache
+from .sample_store import SampleStore
+from .instrumentation import RenderProfiler
+from .note_table import NoteTable
+from .midi_cache import MidiCache
+from .interval_index import IntervalIndex
+from .library_loader import LibraryLoader
+from .pitch_bank import PitchBank
+from .library_index import LibraryIndex
+from .playback import PlaybackEngine
+from .render_job import RenderJob
 
-__all__ = ['MidiProcessor', 'AudioProcessor', 'apply_vibrato', 'apply_glide', 'Project']
\ No newline at end of file
+__all__ = ['MidiProcessor', 'AudioProcessor', 'apply_vibrato', 'apply_glide', 'Project',
+           'PitchShiftCache', 'SampleCache', 'SampleStore', 'RenderProfiler', 'NoteTable',
+           'MidiCache', 'IntervalIndex', 'LibraryLoader', 'PitchBank', 'LibraryIndex',
+           'PlaybackEngine', 'RenderJob']
\ No newline at end of file
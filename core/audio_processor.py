@@ -2,139 +2,525 @@ import numpy as np
 from pydub import AudioSegment
 from pydub.effects import speedup
 import librosa
-import soundfile as sf
-from .effects import apply_vibrato, apply_glide
+from .effects import vibrato_array, glide_shift, varispeed_shift
+from .mixer import MixBus
+from .export import write_blocks, SUBTYPE_PCM_16
+from .decoder import decode_file
+from .pcm import segment_to_array, array_to_segment
+from .pitch_cache import PitchShiftCache, array_hash
+from .sample_cache import SampleCache
+from .parallel_render import render_jobs_parallel, pool_config, create_pool, job_key
+from .pitch_bank import PitchBank, plan_jobs
+from .instrumentation import RenderProfiler, NULL_PROFILER
+from .note_table import NoteTable, note_column
+from contextlib import contextmanager
+from concurrent.futures.process import BrokenProcessPool
+import os
+import time
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
+# 移调质量模式
+QUALITY_VARISPEED = 'varispeed'            # 重采样变速，音高与时长同时改变
+QUALITY_PHASE_VOCODER = 'phase-vocoder'    # librosa相位声码器，保持时长
+QUALITY_MODES = (QUALITY_VARISPEED, QUALITY_PHASE_VOCODER)
+
+SAMPLE_CHANNELS = 1  # 样本统一转为单声道
+
 class AudioProcessor:
-    def __init__(self, sample_rate=44100):
+    def __init__(self, sample_rate=44100, pitch_cache=None, workers=1,
+                 quality=QUALITY_PHASE_VOCODER, sample_cache=None, sample_store=None):
+        if quality not in QUALITY_MODES:
+            raise ValueError(f"未知的移调质量模式: {quality}，可选: {', '.join(QUALITY_MODES)}")
         self.sample_rate = sample_rate
+        self.quality = quality
+        # 渲染进程数，None 表示使用全部CPU核心，1 为单进程串行渲染
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self._missing_sample = AudioSegment.silent(duration=100)
+        # 移调缓存，传入 PitchShiftCache(max_bytes=0) 可关闭内存缓存
+        self.pitch_cache = pitch_cache if pitch_cache is not None else PitchShiftCache()
+        # 解码后的样本缓存，多次渲染之间共享；文件修改后自动失效
+        self.sample_cache = sample_cache if sample_cache is not None else SampleCache()
+        # 可选的磁盘float32样本库（SampleStore），load_sample_array 从中返回内存映射
+        self.sample_store = sample_store
+        # 分阶段性能统计，默认关闭，通过 profiling() 按次开启
+        self.profiler = NULL_PROFILER
+        # 多进程渲染的进程池，首次并行渲染时创建，close() 时关闭
+        self._pool = None
+        self._pool_config = None  # 创建进程池时的 pool_config
+        self._pool_lock = threading.Lock()
+    
+    @property
+    def render_pool(self):
+        """
+        多进程渲染使用的进程池，在多次渲染之间复用
+        
+        工作进程的质量模式等设置在创建时固定，这些配置改变后换用新的进程池。
+        """
+        config = pool_config(self)
+        stale = None
+        with self._pool_lock:
+            if self._pool is not None and self._pool_config != config:
+                stale, self._pool = self._pool, None
+            if self._pool is None:
+                self._pool = create_pool(config)
+                self._pool_config = config
+            pool = self._pool
+        if stale is not None:
+            # 旧进程池中已提交的任务照常完成，之后工作进程退出
+            stale.shutdown(wait=False)
+        return pool
+    
+    def _discard_pool(self, pool):
+        """丢弃已损坏的进程池（如工作进程被终止），下次并行渲染时重新创建"""
+        with self._pool_lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+    
+    def close(self):
+        """关闭渲染进程池，之后再次并行渲染时会重新创建"""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+    
+    @contextmanager
+    def profiling(self, profiler=None, slowest=10, hooks=None):
+        """
+        在 with 块内开启分阶段性能统计
+        
+        用法:
+            with processor.profiling() as profiler:
+                processor.render_track(notes, samples)
+            profiler.to_json('render_profile.json')
+        """
+        if profiler is None:
+            profiler = RenderProfiler(slowest=slowest, hooks=hooks)
+        previous = self.profiler
+        self.profiler = profiler
+        try:
+            yield profiler
+        finally:
+            self.profiler = previous
+            profiler.metadata['sample_rate'] = self.sample_rate
+            profiler.metadata['quality'] = self.quality
+            profiler.metadata['workers'] = self.workers
+            profiler.metadata['pitch_cache'] = self.pitch_cache.stats()
+            profiler.metadata['sample_cache'] = self.sample_cache.stats()
+            if self.sample_store is not None:
+                profiler.metadata['sample_store'] = self.sample_store.stats()
     
-    def load_sample(self, file_path):
-        """加载音频样本"""
+    def load_sample(self, file_path, raise_errors=False):
+        """
+        加载音频样本（解码结果按文件路径、修改时间和大小缓存）
+        
+        加载失败时返回1秒静音；raise_errors 为 True 时改为抛出异常。
+        """
         try:
-            audio = AudioSegment.from_file(file_path)
-            if audio.frame_rate != self.sample_rate:
-                audio = audio.set_frame_rate(self.sample_rate)
-            if audio.channels > 1:
-                audio = audio.set_channels(1)  # 转为单声道
-            return audio
+            start = time.perf_counter()
+            key = SampleCache.make_key(file_path, self.sample_rate, SAMPLE_CHANNELS)
+            audio = self.sample_cache.get(key)
+            if audio is not None:
+                self.profiler.record('sample_cache_hit', time.perf_counter() - start)
+                return audio
+            
+            return self.sample_cache.put(key, self._decode_sample(file_path))
         except Exception as e:
+            if raise_errors:
+                raise
             logger.error(f"加载样本失败: {str(e)}")
             return AudioSegment.silent(duration=1000)  # 返回静音
     
+    def _decode_array(self, file_path):
+        """
+        解码音频文件为目标采样率、单声道的float32数组
+        
+        优先用 libsndfile 直接读取，不支持的格式回退到 pydub/ffmpeg，
+        两种情况分别记录为 decode_soundfile / decode_pydub 阶段。
+        """
+        start = time.perf_counter()
+        samples, decoder = decode_file(file_path, self.sample_rate)
+        self.profiler.record(f'decode_{decoder}', time.perf_counter() - start, samples.nbytes)
+        return samples
+    
+    def _decode_sample(self, file_path):
+        """解码音频文件为目标采样率、单声道的 AudioSegment"""
+        return array_to_segment(self._decode_array(file_path), self.sample_rate)
+    
+    def load_sample_array(self, file_path):
+        """
+        加载float32样本数组
+        
+        配置了 sample_store 时返回磁盘样本库中的只读内存映射（首次使用时解码并写入），
+        多个渲染进程共享同一份页缓存；否则转换 load_sample 的结果。
+        """
+        if self.sample_store is None:
+            return segment_to_array(self.load_sample(file_path))
+        try:
+            start = time.perf_counter()
+            samples = self.sample_store.get(file_path, self._decode_array)
+            self.profiler.record('sample_store', time.perf_counter() - start)
+            return samples
+        except Exception as e:
+            logger.error(f"加载样本失败: {str(e)}")
+            return np.zeros(self.note_length(1.0), dtype=np.float32)  # 返回静音
+    
+    def pitch_shift_array(self, samples, semitones, sample_hash=None):
+        """对float32数组移调，结果可能来自缓存（只读）"""
+        # 相同样本、相同移调量只计算一次
+        if sample_hash is None:
+            sample_hash = array_hash(samples)
+        key = PitchShiftCache.make_key(sample_hash, semitones, self.sample_rate, self.quality)
+        start = time.perf_counter()
+        shifted = self.pitch_cache.get(key)
+        
+        if shifted is None:
+            if self.quality == QUALITY_VARISPEED:
+                # 重采样变速
+                shifted = varispeed_shift(samples, semitones)
+            else:
+                # 使用librosa进行音高变换
+                shifted = librosa.effects.pitch_shift(
+                    samples,
+                    sr=self.sample_rate,
+                    n_steps=semitones
+                )
+            shifted = self.pitch_cache.put(key, shifted)
+            self.profiler.record('pitch_shift', time.perf_counter() - start, shifted.nbytes)
+        else:
+            self.profiler.record('pitch_cache_hit', time.perf_counter() - start)
+        return shifted
+    
     def pitch_shift(self, audio, semitones):
         """改变音频音高（移调）"""
         try:
-            # 将AudioSegment转换为numpy数组
-            samples = np.array(audio.get_array_of_samples())
-            
-            # 使用librosa进行音高变换
-            shifted = librosa.effects.pitch_shift(
-                samples.astype(np.float32) / 32768.0,
-                sr=self.sample_rate,
-                n_steps=semitones
-            )
-            
-            # 转换回AudioSegment
-            shifted = (shifted * 32768.0).astype(np.int16)
-            return AudioSegment(
-                shifted.tobytes(),
-                frame_rate=self.sample_rate,
-                sample_width=2,
-                channels=1
-            )
+            shifted = self.pitch_shift_array(segment_to_array(audio), semitones)
+            return array_to_segment(shifted, self.sample_rate)
         except Exception as e:
             logger.error(f"音高变换失败: {str(e)}")
             return audio  # 返回原始音频
     
+    def process_note_array(self, samples, target_pitch, effects=None, sample_hash=None):
+        """对float32样本做移调并应用效果（不调整长度）"""
+        # 基本音高调整
+        original_pitch = 60  # 假设原始样本是C4 (MIDI 60)
+        semitones = target_pitch - original_pitch
+        try:
+            processed = self.pitch_shift_array(samples, semitones, sample_hash)
+        except Exception as e:
+            logger.error(f"音高变换失败: {str(e)}")
+            processed = samples  # 使用原始音频
+        
+        # 应用效果
+        if effects:
+            if 'vibrato' in effects:
+                start = time.perf_counter()
+                processed = vibrato_array(processed, self.sample_rate,
+                                          rate=effects['vibrato']['rate'],
+                                          depth=effects['vibrato']['depth'])
+                self.profiler.record('vibrato', time.perf_counter() - start, processed.nbytes)
+            
+            if 'glide' in effects:
+                start = time.perf_counter()
+                processed = glide_shift(processed,
+                                        start_pitch=effects['glide']['start'],
+                                        end_pitch=effects['glide']['end'])
+                self.profiler.record('glide', time.perf_counter() - start, processed.nbytes)
+        
+        return processed
+    
+    def note_length(self, duration_sec):
+        """音符时长对应的采样数"""
+        return max(int(round(duration_sec * self.sample_rate)), 0)
+    
+    def fit_duration_array(self, processed, duration_sec):
+        """将float32数组截断或用静音填充到指定时长"""
+        start = time.perf_counter()
+        length = self.note_length(duration_sec)
+        if len(processed) >= length:
+            fitted = processed[:length]
+            self.profiler.record('padding', time.perf_counter() - start)
+            return fitted
+        fitted = np.zeros(length, dtype=np.float32)
+        fitted[:len(processed)] = processed
+        self.profiler.record('padding', time.perf_counter() - start, fitted.nbytes)
+        return fitted
+    
+    def render_note_array(self, note_info, samples, effects=None, sample_hash=None):
+        """渲染单个音符为float32数组"""
+        try:
+            processed = self.process_note_array(samples, note_info['note'], effects, sample_hash)
+            return self.fit_duration_array(processed, note_info['duration_sec'])
+        except Exception as e:
+            logger.error(f"音符渲染失败: {str(e)}")
+            return np.zeros(self.note_length(note_info['duration_sec']), dtype=np.float32)
+    
     def render_note(self, note_info, sample, effects=None):
         """渲染单个音符"""
+        rendered = self.render_note_array(note_info, segment_to_array(sample), effects)
+        return array_to_segment(rendered, self.sample_rate)
+    
+    def _resolve_note(self, note, samples, effects_map):
+        """查找音符对应的样本和效果"""
+        # 获取该音符对应的样本
+        sample = samples.get(note['note'], samples.get('default', None))
+        if sample is None or len(sample) == 0:
+            logger.warning(f"音符 {note['note']} 没有对应的样本，使用静音")
+            sample = self._missing_sample
+        
+        # 获取该音符的效果
+        effects = effects_map.get(note['note'], {}) if effects_map else {}
+        return sample, effects
+    
+    def _sample_array(self, sample, converted):
+        """样本只在边界处转换一次为float32，并计算内容哈希"""
+        entry = converted.get(id(sample))
+        if entry is None:
+            start = time.perf_counter()
+            if isinstance(sample, np.ndarray):
+                samples = np.asarray(sample, dtype=np.float32)
+            else:
+                samples = segment_to_array(sample)
+            entry = converted[id(sample)] = (samples, array_hash(samples))
+            self.profiler.record('convert', time.perf_counter() - start, samples.nbytes)
+        return entry
+    
+    def _render_resolved(self, note, sample, effects, converted):
+        """渲染已确定样本和效果的音符，返回未调整长度的float32数组"""
         try:
-            # 基本音高调整
-            target_pitch = note_info['note']
-            original_pitch = 60  # 假设原始样本是C4 (MIDI 60)
-            semitones = target_pitch - original_pitch
-            processed = self.pitch_shift(sample, semitones)
-            
-            # 应用效果
-            if effects:
-                if 'vibrato' in effects:
-                    processed = apply_vibrato(processed, 
-                                            rate=effects['vibrato']['rate'],
-                                            depth=effects['vibrato']['depth'])
-                
-                if 'glide' in effects:
-                    processed = apply_glide(processed, 
-                                           start_pitch=effects['glide']['start'],
-                                           end_pitch=effects['glide']['end'])
-            
-            # 调整长度
-            target_duration = note_info['duration_sec'] * 1000  # 转换为毫秒
-            if len(processed) > target_duration:
-                processed = processed[:target_duration]
-            elif len(processed) < target_duration:
-                # 使用静音填充
-                silence = AudioSegment.silent(duration=target_duration - len(processed))
-                processed += silence
-            
+            start = time.perf_counter()
+            samples, sample_hash = self._sample_array(sample, converted)
+            processed = self.process_note_array(samples, note['note'], effects, sample_hash)
+            self.profiler.record_note(note, time.perf_counter() - start)
             return processed
         except Exception as e:
             logger.error(f"音符渲染失败: {str(e)}")
-            return AudioSegment.silent(duration=note_info['duration_sec'] * 1000)
+            return np.zeros(0, dtype=np.float32)
+    
+    def plan_pitch_bank(self, notes, samples, effects_map=None):
+        """
+        列出渲染音符所需的不重复 (样本, 目标音高, 效果) 组合
+        
+        返回:
+            {任务键: (样本, 目标音高, 效果, 首个音符)}，见 pitch_bank.plan_jobs
+        """
+        start = time.perf_counter()
+        resolved = [self._resolve_note(note, samples, effects_map) for note in notes]
+        jobs = plan_jobs(notes, resolved)
+        self.profiler.record('plan', time.perf_counter() - start)
+        return jobs
+    
+    def build_pitch_bank(self, notes, samples, effects_map=None, bank=None, cancelled=None,
+                         on_progress=None):
+        """
+        预渲染阶段：每个不重复的 (样本, 目标音高, 效果) 只渲染一次，写入移调样本库
+        
+        多进程模式下并行渲染；传入已有的 bank 时只渲染其中缺少的组合。
+        cancelled 为可选的 threading.Event，设置后尽快返回，样本库中只有已完成的组合；
+        on_progress(已完成数, 总数) 在每批组合渲染完成后调用。
+        """
+        bank = bank if bank is not None else PitchBank()
+        self._fill_pitch_bank(bank, self.plan_pitch_bank(notes, samples, effects_map), {},
+                              cancelled, on_progress)
+        return bank
+    
+    def _fill_pitch_bank(self, bank, jobs, converted, cancelled=None, on_progress=None):
+        """渲染计划中尚未在样本库中的任务，cancelled 被设置时提前返回"""
+        jobs = bank.missing(jobs)
+        if on_progress is not None:
+            on_progress(0, len(jobs))
+        if not jobs:
+            return bank
+        start = time.perf_counter()
+        rendered = {}
+        if self.workers > 1:
+            pool = self.render_pool
+            try:
+                rendered = render_jobs_parallel(
+                    self, jobs,
+                    lambda sample: self._sample_array(sample, converted),
+                    cancelled,
+                    pool,
+                    None if on_progress is None else lambda done: on_progress(done, len(jobs))
+                )
+            except BrokenProcessPool as e:
+                logger.error(f"渲染进程异常退出，剩余音符改为串行渲染: {str(e)}")
+                self._discard_pool(pool)
+            for key, processed in rendered.items():
+                bank.add(key, jobs[key][0], processed)
+        # 串行渲染；多进程模式下补上进程池未能完成的任务
+        done = len(rendered)
+        for key, (sample, pitch, effects, note) in jobs.items():
+            if cancelled is not None and cancelled.is_set():
+                break
+            if key not in bank:
+                bank.add(key, sample, self._render_resolved(note, sample, effects, converted))
+                done += 1
+                if on_progress is not None:
+                    on_progress(done, len(jobs))
+        self.profiler.record('pitch_bank', time.perf_counter() - start,
+                             sum(bank[key].nbytes for key in jobs if key in bank))
+        return bank
+    
+    def render_track_array(self, notes, samples, effects_map=None, bank=None):
+        """
+        渲染整个音轨为float32数组
+        
+        先通过 build_pitch_bank 渲染所有不重复的组合，混音时只从样本库切片叠加。
+        可传入预先构建的 bank 在多次渲染之间复用。
+        """
+        # 按所有音符的实际结束采样位置一次性分配混音缓冲区，取整方式与下面叠加时一致，
+        # 开始时间和时长都向上取整时也不会超出缓冲区而触发扩容
+        offsets = np.round(note_column(notes, 'start_sec') * self.sample_rate).astype(np.int64)
+        lengths = np.maximum(np.round(note_column(notes, 'duration_sec') * self.sample_rate), 0)
+        song_end = int((offsets + lengths.astype(np.int64)).max()) if len(offsets) else 0
+        start = time.perf_counter()
+        bus = MixBus(song_end, self.sample_rate)
+        self.profiler.record('mix', time.perf_counter() - start, bus.buffer.nbytes)
+        
+        # 先确定每个音符使用的样本和效果，再渲染不重复的组合
+        start = time.perf_counter()
+        resolved = [self._resolve_note(note, samples, effects_map) for note in notes]
+        jobs = plan_jobs(notes, resolved)
+        self.profiler.record('plan', time.perf_counter() - start)
+        bank = bank if bank is not None else PitchBank()
+        self._fill_pitch_bank(bank, jobs, {})
+        
+        for note, (sample, effects) in zip(notes, resolved):
+            processed = bank[job_key(sample, note['note'], effects)]
+            
+            # 按整数采样偏移叠加到混音总线，不足部分视为静音
+            offset = int(round(note['start_sec'] * self.sample_rate))
+            length = self.note_length(note['duration_sec'])
+            start = time.perf_counter()
+            capacity = len(bus.buffer)
+            bus.add(processed[:length], offset, length)
+            self.profiler.record('mix', time.perf_counter() - start,
+                                 (len(bus.buffer) - capacity) * 4)
+        
+        return bus.to_array()
     
     def render_track(self, notes, samples, effects_map=None):
         """渲染整个音轨"""
         try:
-            track = AudioSegment.silent(duration=0)
-            timeline = {}
+            mixed = self.render_track_array(notes, samples, effects_map)
             
-            # 创建时间线
-            for note in notes:
-                start_ms = note['start_sec'] * 1000
-                end_ms = note['end_sec'] * 1000
-                
-                # 获取该音符对应的样本
-                sample = samples.get(note['note'], samples.get('default', None))
-                if not sample:
-                    logger.warning(f"音符 {note['note']} 没有对应的样本，使用静音")
-                    sample = AudioSegment.silent(duration=100)
-                
-                # 获取该音符的效果
-                effects = effects_map.get(note['note'], {}) if effects_map else {}
-                
-                # 渲染音符
-                note_audio = self.render_note(note, sample, effects)
-                
-                # 添加到时间线
-                if start_ms not in timeline:
-                    timeline[start_ms] = []
-                timeline[start_ms].append(note_audio)
+            # 最后统一转换为int16
+            start = time.perf_counter()
+            track = array_to_segment(mixed, self.sample_rate)
+            self.profiler.record('encode', time.perf_counter() - start, len(track.raw_data))
+            return track
+        except Exception as e:
+            logger.error(f"音轨渲染失败: {str(e)}")
+            return AudioSegment.silent(duration=5000)  # 返回5秒静音
+    
+    def render_blocks(self, notes, samples, effects_map=None, block_size=65536, bank=None,
+                      start_sec=0.0, cancelled=None):
+        """
+        流式渲染：按时间顺序逐块生成float32 PCM
+        
+        只保留与当前块窗口重叠的已渲染音符，峰值内存取决于复音数而非歌曲长度。
+        所有块拼接后与 render_track 的结果一致，最后一块会截断到歌曲末尾。
+        notes 为列表或 NoteTable 时先按开始时间排序；其他可迭代对象
+        （如 MidiProcessor.iter_notes）需已按开始时间排序，会边读取边渲染。
+        
+        每个 (样本, 目标音高, 效果) 组合只渲染一次并保存在移调样本库中；
+        多进程模式下列表和 NoteTable 会先并行构建整个样本库，
+        其他可迭代对象在首次遇到某个组合时渲染。
+        
+        start_sec 大于0时从该位置开始输出（用于播放时定位），
+        结果与完整渲染在该采样位置之后的部分一致。
+        
+        cancelled 为可选的 threading.Event，设置后在预渲染样本库期间或下一块之前停止输出。
+        """
+        bank = bank if bank is not None else PitchBank()
+        converted = {}
+        if isinstance(notes, (NoteTable, list, tuple)):
+            # 跳过定位点之前已经结束的音符（留一个采样的余量，避免取整差异）
+            cutoff = start_sec - 1.0 / self.sample_rate
+            if isinstance(notes, NoteTable):
+                notes = notes.sort('start_sec')
+                if start_sec > 0:
+                    notes = notes.filter(notes['end_sec'] > cutoff)
+            else:
+                notes = sorted((note for note in notes if start_sec <= 0 or note['end_sec'] > cutoff),
+                               key=lambda note: note['start_sec'])
+            if self.workers > 1:
+                self._fill_pitch_bank(bank, self.plan_pitch_bank(notes, samples, effects_map),
+                                      converted, cancelled)
+        order = iter(notes)
+        note = next(order, None)
+        active = []  # (采样偏移, float32数组)
+        song_end = 0
+        block_start = max(int(round(start_sec * self.sample_rate)), 0)
+        
+        while True:
+            if cancelled is not None and cancelled.is_set():
+                return
+            block_end = block_start + block_size
             
-            # 混合音频
-            max_time = max(timeline.keys()) if timeline else 0
-            current_time = 0
+            # 渲染在本块内开始的音符
+            while note is not None:
+                offset = int(round(note['start_sec'] * self.sample_rate))
+                if offset >= block_end:
+                    break
+                sample, effects = self._resolve_note(note, samples, effects_map)
+                key = job_key(sample, note['note'], effects)
+                if key not in bank:
+                    bank.add(key, sample, self._render_resolved(note, sample, effects, converted))
+                length = self.note_length(note['duration_sec'])
+                audio = bank[key][:length]
+                if length:
+                    song_end = max(song_end, offset + length)
+                if len(audio):
+                    active.append((offset, audio))
+                note = next(order, None)
             
-            for time in sorted(timeline.keys()):
-                # 确保时间线连续
-                if time > current_time:
-                    silence = AudioSegment.silent(duration=time - current_time)
-                    track += silence
-                    current_time = time
-                
-                # 混合同时发生的音符
-                mixed = sum(timeline[time], AudioSegment.silent(duration=0))
-                track = track.overlay(mixed, position=time)
-                current_time = max(current_time, time + len(mixed))
+            # 混合与本块重叠的部分
+            start = time.perf_counter()
+            block = np.zeros(block_size, dtype=np.float32)
+            remaining = []
+            for offset, audio in active:
+                lo = max(offset, block_start)
+                hi = min(offset + len(audio), block_end)
+                if hi > lo:
+                    block[lo - block_start:hi - block_start] += audio[lo - offset:hi - offset]
+                if offset + len(audio) > block_end:
+                    remaining.append((offset, audio))
+            active = remaining
+            self.profiler.record('mix', time.perf_counter() - start, block.nbytes)
             
-            # 确保总长度足够
-            if len(track) < max_time:
-                silence = AudioSegment.silent(duration=max_time - len(track))
-                track += silence
+            if note is None and not active and song_end <= block_end:
+                # 最后一块截断到歌曲末尾
+                block = block[:max(song_end - block_start, 0)]
+                if len(block):
+                    yield block
+                return
             
-            return track
-        except Exception as e:
-            logger.error(f"音轨渲染失败: {str(e)}")
-            return AudioSegment.silent(duration=5000)  # 返回5秒静音
\ No newline at end of file
+            yield block
+            block_start = block_end
+    
+    def render_to_file(self, file_path, notes, samples, effects_map=None, block_size=65536,
+                       subtype=SUBTYPE_PCM_16, file_format=None, bank=None):
+        """
+        流式渲染并逐块写入 WAV/FLAC 文件，返回写入的采样帧数
+        
+        写入在后台线程中进行，渲染下一块的同时编码和写盘上一块。
+        格式由扩展名决定，subtype 为 PCM_16、PCM_24 或 FLOAT（仅WAV）。
+        """
+        return write_blocks(
+            file_path,
+            self.render_blocks(notes, samples, effects_map, block_size, bank),
+            self.sample_rate,
+            subtype,
+            file_format
+        )
+    
+    def render_to_wav(self, file_path, notes, samples, effects_map=None, block_size=65536,
+                      subtype=SUBTYPE_PCM_16):
+        """流式渲染并逐块写入WAV文件，返回写入的采样帧数"""
+        return self.render_to_file(file_path, notes, samples, effects_map, block_size,
+                                   subtype, 'WAV')
@@ -0,0 +1,68 @@
+import logging
+import numpy as np
+import soundfile as sf
+import librosa
+from pydub import AudioSegment
+from .pcm import segment_to_array
+
+logger = logging.getLogger(__name__)
+
+DECODER_SOUNDFILE = 'soundfile'
+DECODER_PYDUB = 'pydub'
+
+
+def downmix(samples):
+    """将 (帧数, 声道数) 的数组平均为单声道"""
+    if samples.ndim == 1:
+        return samples
+    channels = samples.shape[1]
+    if channels == 1:
+        return samples[:, 0]
+    # 矩阵乘法比 mean(axis=1) 的跨步归约快一个数量级
+    return samples @ np.full(channels, 1.0 / channels, dtype=np.float32)
+
+
+def resample(samples, source_rate, target_rate):
+    """重采样（librosa/soxr），采样率相同时原样返回"""
+    if source_rate == target_rate or not len(samples):
+        return samples
+    return librosa.resample(samples, orig_sr=source_rate, target_sr=target_rate).astype(np.float32, copy=False)
+
+
+def decode_soundfile(file_path, sample_rate):
+    """通过 libsndfile 直接读取为float32并转换为单声道、目标采样率"""
+    samples, source_rate = sf.read(file_path, dtype='float32', always_2d=True)
+    return resample(np.ascontiguousarray(downmix(samples)), source_rate, sample_rate)
+
+
+def decode_pydub(file_path, sample_rate):
+    """通过 pydub/ffmpeg 解码，用于 libsndfile 不支持的格式"""
+    audio = AudioSegment.from_file(file_path)
+    if audio.channels > 1:
+        audio = audio.set_channels(1)
+    samples = segment_to_array(audio)
+    return resample(samples, audio.frame_rate, sample_rate)
+
+
+def decode_file(file_path, sample_rate, decoder=None):
+    """
+    解码音频文件为目标采样率的单声道float32数组
+    
+    先尝试 libsndfile（WAV/FLAC/OGG/AIFF，libsndfile 1.1 起包括 MP3），
+    无法识别的格式再交给 pydub/ffmpeg。
+    
+    参数:
+        decoder: 指定 DECODER_SOUNDFILE 或 DECODER_PYDUB 时只使用该解码器
+    
+    返回:
+        (float32数组, 实际使用的解码器)
+    """
+    if decoder == DECODER_PYDUB:
+        return decode_pydub(file_path, sample_rate), DECODER_PYDUB
+    try:
+        return decode_soundfile(file_path, sample_rate), DECODER_SOUNDFILE
+    except (sf.LibsndfileError, RuntimeError, TypeError) as e:
+        if decoder == DECODER_SOUNDFILE:
+            raise
+        logger.debug(f"libsndfile 无法解码 {file_path}，改用 pydub: {str(e)}")
+    return decode_pydub(file_path, sample_rate), DECODER_PYDUB
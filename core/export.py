@@ -0,0 +1,148 @@
+import os
+import queue
+import threading
+import numpy as np
+import soundfile as sf
+from .pcm import array_to_int16, array_to_pcm24
+
+# 输出格式（按扩展名）与采样格式
+EXPORT_FORMATS = {'.wav': 'WAV', '.flac': 'FLAC'}
+SUBTYPE_PCM_16 = 'PCM_16'
+SUBTYPE_PCM_24 = 'PCM_24'
+SUBTYPE_FLOAT = 'FLOAT'
+EXPORT_SUBTYPES = (SUBTYPE_PCM_16, SUBTYPE_PCM_24, SUBTYPE_FLOAT)
+
+_STOP = object()
+
+
+def export_format(file_path, file_format=None):
+    """根据扩展名确定输出格式，未知扩展名时抛出 ValueError"""
+    if file_format:
+        return file_format.upper()
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext not in EXPORT_FORMATS:
+        raise ValueError(f"不支持的导出格式: {ext or file_path}，可选: {', '.join(EXPORT_FORMATS)}")
+    return EXPORT_FORMATS[ext]
+
+
+def encode_block(block, subtype):
+    """将float32块转换为 soundfile 写入用的数组，整数格式在此限幅量化"""
+    if subtype == SUBTYPE_PCM_16:
+        return array_to_int16(block)
+    if subtype == SUBTYPE_PCM_24:
+        return array_to_pcm24(block)
+    return np.asarray(block, dtype=np.float32)
+
+
+class BlockWriter:
+    """
+    后台写入线程：主线程 write() 放入有界队列，写入线程转换格式并通过 soundfile 写盘
+    
+    队列满时 write() 阻塞，渲染与磁盘I/O重叠进行的同时内存占用有上限。
+    写入线程出错后会继续取走队列中的块（丢弃），下一次 write() 或 close() 抛出该错误。
+    
+    用法:
+        with BlockWriter('out.flac', 44100, SUBTYPE_PCM_24) as writer:
+            for block in processor.render_blocks(notes, samples):
+                writer.write(block)
+    """
+    
+    def __init__(self, file_path, sample_rate=44100, subtype=SUBTYPE_PCM_16,
+                 file_format=None, queue_size=8):
+        if subtype not in EXPORT_SUBTYPES:
+            raise ValueError(f"未知的采样格式: {subtype}，可选: {', '.join(EXPORT_SUBTYPES)}")
+        self.file_path = file_path
+        self.sample_rate = sample_rate
+        self.subtype = subtype
+        self.file_format = export_format(file_path, file_format)
+        if not sf.check_format(self.file_format, subtype):
+            raise ValueError(f"{self.file_format} 不支持采样格式 {subtype}")
+        self.frames = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._error = None
+        self._closed = False
+        # 在调用线程中打开文件，路径或格式错误立即抛出
+        self._file = sf.SoundFile(
+            file_path, 'w',
+            samplerate=sample_rate,
+            channels=1,
+            subtype=subtype,
+            format=self.file_format
+        )
+        self._thread = threading.Thread(target=self._run, name='block-writer', daemon=True)
+        self._thread.start()
+    
+    def _run(self):
+        while True:
+            block = self._queue.get()
+            if block is _STOP:
+                break
+            if self._error is not None:
+                continue
+            try:
+                self._file.write(encode_block(block, self.subtype))
+            except Exception as e:
+                self._error = e
+        try:
+            self._file.close()
+        except Exception as e:
+            if self._error is None:
+                self._error = e
+    
+    def write(self, block):
+        """放入一个float32块，队列满时等待写入线程"""
+        if self._error is not None:
+            raise self._error
+        if self._closed:
+            raise ValueError("写入器已关闭")
+        self._queue.put(block)
+        self.frames += len(block)
+    
+    def close(self):
+        """等待所有块写完并关闭文件"""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_STOP)
+            self._thread.join()
+        if self._error is not None:
+            raise self._error
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # 已有异常时只关闭文件，不覆盖原异常
+            try:
+                self.close()
+            except Exception:
+                pass
+        return False
+
+
+def write_blocks(file_path, blocks, sample_rate=44100, subtype=SUBTYPE_PCM_16,
+                 file_format=None, queue_size=8):
+    """
+    逐块写入单声道 WAV/FLAC 文件，写入在后台线程中进行
+    
+    参数:
+        file_path: 输出路径，格式由扩展名（.wav/.flac）或 file_format 决定
+        blocks: 产生float32数组的可迭代对象（如 AudioProcessor.render_blocks）
+        sample_rate: 采样率
+        subtype: SUBTYPE_PCM_16、SUBTYPE_PCM_24 或 SUBTYPE_FLOAT（FLAC 不支持浮点）
+        queue_size: 等待写入的最大块数
+    
+    返回:
+        写入的采样帧数
+    """
+    with BlockWriter(file_path, sample_rate, subtype, file_format, queue_size) as writer:
+        for block in blocks:
+            writer.write(block)
+    return writer.frames
+
+
+def write_wav_blocks(file_path, blocks, sample_rate=44100):
+    """逐块写入16位单声道WAV文件，返回写入的采样帧数"""
+    return write_blocks(file_path, blocks, sample_rate, SUBTYPE_PCM_16, 'WAV')
@@ -0,0 +1,130 @@
+import json
+import heapq
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class RenderProfiler:
+    """
+    渲染分阶段统计：耗时、调用次数、分配字节数和最慢的渲染
+    
+    每个不重复的 (样本, 目标音高, 效果) 组合只在移调样本库中渲染一次，
+    record_note 记录的是这些组合的渲染耗时（以首个使用该组合的音符表示），
+    其余音符只从样本库切片混音，耗时计入 mix 阶段。
+    多进程模式下的组合耗时和阶段统计在工作进程中测量，通过 merge 汇总。
+    
+    钩子为接收事件字典的可调用对象，事件格式:
+        {'type': 'stage', 'stage': 名称, 'seconds': 耗时, 'bytes': 字节数}
+        {'type': 'note', 'note': 音符摘要, 'seconds': 耗时}
+    """
+    
+    enabled = True
+    
+    def __init__(self, slowest=10, hooks=None):
+        self.slowest = slowest
+        self.hooks = list(hooks or [])
+        self.stages = {}
+        self.metadata = {}
+        self._slowest_renders = []  # 最小堆，保留最慢的 N 次组合渲染
+        self._render_seq = 0
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+    
+    def add_hook(self, hook):
+        """注册事件回调"""
+        self.hooks.append(hook)
+    
+    def _emit(self, event):
+        for hook in self.hooks:
+            try:
+                hook(event)
+            except Exception as e:
+                logger.error(f"性能统计回调失败: {str(e)}")
+    
+    def record(self, stage, seconds, nbytes=0):
+        """记录一次阶段调用"""
+        with self._lock:
+            entry = self.stages.get(stage)
+            if entry is None:
+                entry = self.stages[stage] = {'calls': 0, 'seconds': 0.0, 'bytes': 0}
+            entry['calls'] += 1
+            entry['seconds'] += seconds
+            entry['bytes'] += int(nbytes)
+        if self.hooks:
+            self._emit({'type': 'stage', 'stage': stage, 'seconds': seconds, 'bytes': int(nbytes)})
+    
+    def merge(self, stages):
+        """合并工作进程的阶段统计 {阶段: {'calls', 'seconds', 'bytes'}}，不触发钩子"""
+        with self._lock:
+            for stage, other in stages.items():
+                entry = self.stages.get(stage)
+                if entry is None:
+                    entry = self.stages[stage] = {'calls': 0, 'seconds': 0.0, 'bytes': 0}
+                entry['calls'] += other['calls']
+                entry['seconds'] += other['seconds']
+                entry['bytes'] += other['bytes']
+    
+    def record_note(self, note, seconds):
+        """记录一个不重复组合的渲染耗时，note 为首个使用该组合的音符"""
+        summary = {
+            'note': note.get('note'),
+            'start_sec': note.get('start_sec'),
+            'duration_sec': note.get('duration_sec'),
+            'seconds': seconds
+        }
+        with self._lock:
+            self._render_seq += 1
+            item = (seconds, self._render_seq, summary)
+            if len(self._slowest_renders) < self.slowest:
+                heapq.heappush(self._slowest_renders, item)
+            elif self.slowest and seconds > self._slowest_renders[0][0]:
+                heapq.heapreplace(self._slowest_renders, item)
+        if self.hooks:
+            self._emit({'type': 'note', 'note': summary, 'seconds': seconds})
+    
+    def report(self):
+        """生成统计报告字典"""
+        with self._lock:
+            stages = {
+                name: dict(entry, mean_ms=entry['seconds'] / entry['calls'] * 1000)
+                for name, entry in self.stages.items()
+            }
+            slowest = [item[2] for item in sorted(self._slowest_renders, reverse=True)]
+            return {
+                'wall_sec': time.perf_counter() - self._started,
+                'renders': self._render_seq,
+                'stages': stages,
+                'slowest_renders': slowest,
+                'slowest_renders_note': "按不重复的 (样本, 目标音高, 效果) 组合统计，"
+                                        "音符为首个使用该组合的音符；复用组合的音符只计入 mix 阶段",
+                'metadata': dict(self.metadata)
+            }
+    
+    def to_json(self, file_path=None, indent=2):
+        """导出 JSON 报告，提供路径时同时写入文件"""
+        text = json.dumps(self.report(), indent=indent, ensure_ascii=False)
+        if file_path:
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        return text
+
+
+class NullProfiler:
+    """未开启统计时使用的空实现"""
+    
+    enabled = False
+    
+    def record(self, stage, seconds, nbytes=0):
+        pass
+    
+    def merge(self, stages):
+        pass
+    
+    def record_note(self, note, seconds):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
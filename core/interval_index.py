@@ -0,0 +1,128 @@
+import numpy as np
+from .note_table import note_column
+
+
+class IntervalIndex:
+    """
+    时间区间索引：按开始时间排序，并记录开始时间前缀上的最大结束时间
+    
+    区间为左闭右开 [start, end)。重叠查询先用 searchsorted 在排序后的开始时间中
+    截取 start < t1 的前缀，再在最大结束时间（单调不减）中跳过所有 end <= t0 的前段，
+    只对剩余的候选做向量化过滤。
+    
+    插入的区间先放在缓冲区中，删除只做标记，缓冲区或删除数量超过阈值时自动重建。
+    """
+    
+    def __init__(self, starts=(), ends=(), ids=None, buffer_size=1024):
+        """
+        参数:
+            starts, ends: 区间开始和结束时间（秒）
+            ids: 每个区间的编号，默认为 0..n-1（即在音符表中的行号）
+            buffer_size: 插入缓冲区和删除标记的重建阈值
+        """
+        starts = np.asarray(starts, dtype=np.float64)
+        ends = np.asarray(ends, dtype=np.float64)
+        if ids is None:
+            ids = np.arange(len(starts), dtype=np.int64)
+        self.buffer_size = buffer_size
+        self._build(starts, ends, np.asarray(ids, dtype=np.int64))
+    
+    @classmethod
+    def from_notes(cls, notes, buffer_size=1024):
+        """由 NoteTable 或音符字典列表创建，编号为音符所在的行号"""
+        return cls(note_column(notes, 'start_sec'), note_column(notes, 'end_sec'),
+                   buffer_size=buffer_size)
+    
+    def _build(self, starts, ends, ids):
+        order = np.argsort(starts, kind='stable')
+        self._starts = starts[order]
+        self._ends = ends[order]
+        self._ids = ids[order]
+        if len(self._ends):
+            self._max_ends = np.maximum.accumulate(self._ends)
+        else:
+            self._max_ends = self._ends
+        self._alive = np.ones(len(self._ids), dtype=bool)
+        self._positions = None  # 编号 -> 排序后位置，首次删除时建立
+        self._removed = 0
+        self._added = {}  # 编号 -> (开始, 结束)，尚未合并的插入
+    
+    def __len__(self):
+        return len(self._ids) - self._removed + len(self._added)
+    
+    def __repr__(self):
+        return f"IntervalIndex({len(self)} intervals)"
+    
+    def _position(self, interval_id):
+        if self._positions is None:
+            self._positions = {value: index for index, value in enumerate(self._ids.tolist())}
+        index = self._positions.get(interval_id)
+        if index is None or not self._alive[index]:
+            return None
+        return index
+    
+    def __contains__(self, interval_id):
+        return interval_id in self._added or self._position(interval_id) is not None
+    
+    def insert(self, interval_id, start, end):
+        """插入区间，编号已存在时替换原区间"""
+        interval_id = int(interval_id)
+        self.remove(interval_id)
+        self._added[interval_id] = (float(start), float(end))
+        if len(self._added) > self.buffer_size:
+            self.compact()
+    
+    def remove(self, interval_id):
+        """删除区间，返回是否存在"""
+        interval_id = int(interval_id)
+        if self._added.pop(interval_id, None) is not None:
+            return True
+        index = self._position(interval_id)
+        if index is None:
+            return False
+        self._alive[index] = False
+        self._removed += 1
+        if self._removed > max(self.buffer_size, len(self._ids) // 2):
+            self.compact()
+        return True
+    
+    def compact(self):
+        """合并插入缓冲区并清除已删除的区间"""
+        alive = self._alive
+        starts = self._starts[alive]
+        ends = self._ends[alive]
+        ids = self._ids[alive]
+        if self._added:
+            added_ids = np.fromiter(self._added.keys(), dtype=np.int64, count=len(self._added))
+            added = np.array(list(self._added.values()), dtype=np.float64)
+            starts = np.concatenate((starts, added[:, 0]))
+            ends = np.concatenate((ends, added[:, 1]))
+            ids = np.concatenate((ids, added_ids))
+        self._build(starts, ends, ids)
+    
+    def _query(self, hi, t0):
+        # 候选为前 hi 个区间中最大结束时间超过 t0 之后的部分
+        lo = int(np.searchsorted(self._max_ends[:hi], t0, side='right'))
+        mask = self._ends[lo:hi] > t0
+        if self._removed:
+            mask &= self._alive[lo:hi]
+        return self._ids[lo:hi][mask]
+    
+    def _finish(self, result, added):
+        if added:
+            result = np.concatenate((result, np.array(added, dtype=np.int64)))
+        return np.sort(result)
+    
+    def overlap(self, t0, t1):
+        """返回与 [t0, t1) 重叠的区间编号（升序）"""
+        hi = int(np.searchsorted(self._starts, t1, side='left'))
+        added = [interval_id for interval_id, (start, end) in self._added.items()
+                 if start < t1 and end > t0]
+        return self._finish(self._query(hi, t0), added)
+    
+    def at(self, t):
+        """返回在时间点 t 处发声的区间编号（start <= t < end，升序）"""
+        hi = int(np.searchsorted(self._starts, t, side='right'))
+        added = [interval_id for interval_id, (start, end) in self._added.items()
+                 if start <= t < end]
+        return self._finish(self._query(hi, t), added)
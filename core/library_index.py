@@ -0,0 +1,345 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import soundfile as sf
+import librosa
+from pydub import AudioSegment
+from utils.file_utils import scan_audio_files
+from .decoder import downmix
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    path TEXT PRIMARY KEY,
+    folder TEXT NOT NULL,
+    name TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    duration REAL,
+    sample_rate INTEGER,
+    channels INTEGER,
+    peak REAL,
+    rms REAL,
+    root_pitch INTEGER,
+    error TEXT,
+    indexed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS samples_folder ON samples (folder);
+CREATE INDEX IF NOT EXISTS samples_name ON samples (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS samples_root_pitch ON samples (root_pitch);
+CREATE INDEX IF NOT EXISTS samples_duration ON samples (duration);
+"""
+
+COLUMNS = ('path', 'folder', 'name', 'mtime_ns', 'size', 'duration', 'sample_rate',
+           'channels', 'peak', 'rms', 'root_pitch', 'error', 'indexed_at')
+
+# query 允许的排序列
+ORDER_COLUMNS = ('name', 'path', 'duration', 'root_pitch', 'peak', 'rms', 'mtime_ns', 'size')
+
+PITCH_ANALYSIS_SEC = 2.0  # 只分析开头一段检测音高
+PITCH_MIN_STABILITY = 0.6  # 有声帧中与中位音高相差半音以内的比例，低于此值视为无固定音高
+PITCH_RANGE = (24, 108)  # 可检测的根音范围（C1-C8）
+
+
+def detect_root_pitch(samples, sample_rate):
+    """
+    检测单声道样本的根音（MIDI音符号），无法确定音高时（如打击乐）返回None
+    
+    在开头 PITCH_ANALYSIS_SEC 秒内对能量较高的帧做 YIN 基频估计，取中位数。
+    """
+    frame_length = 2048
+    samples = np.asarray(samples[:int(PITCH_ANALYSIS_SEC * sample_rate)], dtype=np.float32)
+    if len(samples) < frame_length or not np.any(samples):
+        return None
+    f0 = librosa.yin(samples, fmin=librosa.midi_to_hz(PITCH_RANGE[0] - 3),
+                     fmax=librosa.midi_to_hz(PITCH_RANGE[1] + 3),
+                     sr=sample_rate, frame_length=frame_length)
+    energy = librosa.feature.rms(y=samples, frame_length=frame_length)[0][:len(f0)]
+    voiced = f0[:len(energy)][energy >= energy.max() * 0.1]
+    if not len(voiced):
+        return None
+    pitches = librosa.hz_to_midi(voiced)
+    median = float(np.median(pitches))
+    if np.mean(np.abs(pitches - median) <= 0.5) < PITCH_MIN_STABILITY:
+        return None
+    root = int(round(median))
+    # 搜索范围比可检测范围两端各宽三个半音，噪声的 YIN 估计会贴在搜索范围的边界上
+    if not PITCH_RANGE[0] <= root <= PITCH_RANGE[1]:
+        return None
+    return root
+
+
+def _read_audio(file_path):
+    """读取源文件原始采样率下的float32数据，返回 (数组(帧数, 声道数), 采样率)"""
+    try:
+        return sf.read(file_path, dtype='float32', always_2d=True)
+    except (sf.LibsndfileError, RuntimeError, TypeError):
+        # libsndfile 无法识别的格式交给 pydub/ffmpeg
+        audio = AudioSegment.from_file(file_path)
+        samples = np.array(audio.get_array_of_samples()).astype(np.float32)
+        samples /= float(2 ** (8 * audio.sample_width - 1))
+        return samples.reshape(-1, audio.channels), audio.frame_rate
+
+
+def analyze_file(file_path):
+    """
+    分析音频文件，返回时长、采样率、声道数、峰值、RMS（线性幅度）和根音
+    
+    解码失败时抛出异常，由调用者记录。
+    """
+    samples, sample_rate = _read_audio(file_path)
+    frames, channels = samples.shape
+    mono = np.ascontiguousarray(downmix(samples))
+    return {
+        'duration': frames / sample_rate,
+        'sample_rate': int(sample_rate),
+        'channels': int(channels),
+        'peak': float(np.max(np.abs(samples))) if frames else 0.0,
+        'rms': float(np.sqrt(np.mean(np.square(samples, dtype=np.float64)))) if frames else 0.0,
+        'root_pitch': detect_root_pitch(mono, sample_rate)
+    }
+
+
+class LibraryIndex:
+    """
+    本地样本库索引（SQLite）
+    
+    每个音频文件一行，记录路径、修改时间、大小以及分析结果（时长、采样率、声道数、
+    峰值、RMS、根音）。重新扫描时只分析新增或修改（修改时间或大小变化）的文件，
+    并删除已不存在的文件；分析失败的文件也会记录，直到文件再次变化才重试。
+    连接可在多个线程间共享，所有操作由同一把锁串行化。
+    """
+    
+    def __init__(self, db_path, analyze=analyze_file):
+        self.db_path = db_path
+        self.analyze = analyze
+        self._lock = threading.Lock()
+        folder = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(folder, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        try:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._init_schema()
+        except sqlite3.Error:
+            # 数据库被锁定或已损坏时不留下打开的连接
+            self._conn.close()
+            raise
+    
+    def _init_schema(self):
+        with self._lock, self._conn:
+            version = self._conn.execute('PRAGMA user_version').fetchone()[0]
+            if version != SCHEMA_VERSION:
+                # 索引内容都可以重新扫描得到，版本不同时直接重建
+                self._conn.execute('DROP TABLE IF EXISTS samples')
+                self._conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+            self._conn.executescript(SCHEMA)
+    
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    @staticmethod
+    def _folder_clause(folder, recursive):
+        """目录条件：递归时按路径前缀做范围查询，可以使用主键索引"""
+        folder = os.path.abspath(folder)
+        if not recursive:
+            return 'folder = ?', [folder]
+        prefix = os.path.join(folder, '')
+        # 前缀范围 [prefix, prefix 的最后一个字符 + 1)
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return 'path >= ? AND path < ?', [prefix, upper]
+    
+    def _indexed_files(self, folder, recursive):
+        clause, params = self._folder_clause(folder, recursive)
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT path, mtime_ns, size FROM samples WHERE {clause}', params
+            ).fetchall()
+        return {row['path']: (row['mtime_ns'], row['size']) for row in rows}
+    
+    def _analyze_row(self, path, mtime_ns, size):
+        row = dict.fromkeys(COLUMNS)
+        row.update(path=path, folder=os.path.dirname(path),
+                   name=os.path.splitext(os.path.basename(path))[0],
+                   mtime_ns=mtime_ns, size=size, indexed_at=time.time())
+        try:
+            row.update(self.analyze(path))
+        except Exception as e:
+            logger.error(f"分析样本失败 {path}: {str(e)}")
+            row['error'] = str(e)
+        return row
+    
+    def _write_rows(self, rows):
+        placeholders = ', '.join('?' * len(COLUMNS))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO samples ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+                [tuple(row[column] for column in COLUMNS) for row in rows]
+            )
+    
+    def scan(self, directory, recursive=True, workers=4, batch_size=256,
+             on_progress=None, cancelled=None):
+        """
+        增量扫描目录并更新索引
+        
+        参数:
+            directory: 样本目录
+            recursive: 是否包含子目录
+            workers: 分析文件的线程数
+            batch_size: 每个写入事务包含的文件数
+            on_progress: 每写入一批后调用 on_progress(已分析数, 需分析总数)
+            cancelled: 返回True时停止分析剩余文件（已分析的结果仍会写入）
+        
+        返回:
+            统计字典: scanned、added、updated、removed、unchanged、failed、elapsed
+        """
+        start = time.perf_counter()
+        found = {path: (mtime_ns, size)
+                 for path, mtime_ns, size in scan_audio_files(directory, recursive)}
+        indexed = self._indexed_files(directory, recursive)
+        
+        changed = [(path, *state) for path, state in found.items() if indexed.get(path) != state]
+        removed = [path for path in indexed if path not in found]
+        if removed:
+            with self._lock, self._conn:
+                self._conn.executemany('DELETE FROM samples WHERE path = ?',
+                                       [(path,) for path in removed])
+        
+        stats = {
+            'scanned': len(found),
+            'added': 0,
+            'updated': 0,
+            'removed': len(removed),
+            'unchanged': len(found) - len(changed),
+            'failed': 0
+        }
+        if on_progress:
+            on_progress(0, len(changed))
+        is_cancelled = cancelled if cancelled is not None else (lambda: False)
+        
+        def analyze(item):
+            # 取消后尚未开始的文件直接跳过，下次扫描时仍会被视为需要分析
+            return None if is_cancelled() else self._analyze_row(*item)
+        
+        with ThreadPoolExecutor(max_workers=max(1, workers),
+                                thread_name_prefix='library-index') as executor:
+            for batch_start in range(0, len(changed), batch_size):
+                if is_cancelled():
+                    break
+                batch = changed[batch_start:batch_start + batch_size]
+                rows = [row for row in executor.map(analyze, batch) if row is not None]
+                self._write_rows(rows)
+                for row in rows:
+                    stats['updated' if row['path'] in indexed else 'added'] += 1
+                    stats['failed'] += row['error'] is not None
+                if on_progress:
+                    on_progress(batch_start + len(rows), len(changed))
+        stats['elapsed'] = time.perf_counter() - start
+        return stats
+    
+    def query(self, text=None, folder=None, recursive=True, root_pitch=None,
+              min_duration=None, max_duration=None, min_peak=None, max_peak=None,
+              sample_rate=None, channels=None, include_failed=False,
+              order_by='name', descending=False, limit=None, offset=0):
+        """
+        按条件查询索引，返回字典列表
+        
+        参数:
+            text: 文件名包含的文本（不区分大小写）
+            folder: 只返回该目录下的样本，recursive 为False时不含子目录
+            root_pitch: 根音，MIDI音符号或 (最低, 最高) 闭区间
+            min_duration/max_duration: 时长范围（秒）
+            min_peak/max_peak: 峰值范围（线性幅度）
+            sample_rate/channels: 精确匹配
+            include_failed: 是否包含分析失败的文件
+            order_by: 排序列，见 ORDER_COLUMNS
+            limit/offset: 分页
+        """
+        if order_by not in ORDER_COLUMNS:
+            raise ValueError(f"不支持的排序列: {order_by}，可选: {', '.join(ORDER_COLUMNS)}")
+        clauses = []
+        params = []
+        if text:
+            escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            clauses.append("name LIKE ? ESCAPE '\\'")
+            params.append(f'%{escaped}%')
+        if folder is not None:
+            clause, folder_params = self._folder_clause(folder, recursive)
+            clauses.append(clause)
+            params.extend(folder_params)
+        if root_pitch is not None:
+            if isinstance(root_pitch, (tuple, list)):
+                clauses.append('root_pitch BETWEEN ? AND ?')
+                params.extend(int(pitch) for pitch in root_pitch)
+            else:
+                clauses.append('root_pitch = ?')
+                params.append(int(root_pitch))
+        for column, operator, value in (('duration', '>=', min_duration),
+                                        ('duration', '<=', max_duration),
+                                        ('peak', '>=', min_peak),
+                                        ('peak', '<=', max_peak),
+                                        ('sample_rate', '=', sample_rate),
+                                        ('channels', '=', channels)):
+            if value is not None:
+                clauses.append(f'{column} {operator} ?')
+                params.append(value)
+        if not include_failed:
+            clauses.append('error IS NULL')
+        
+        sql = 'SELECT * FROM samples'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        collate = ' COLLATE NOCASE' if order_by == 'name' else ''
+        sql += f" ORDER BY {order_by}{collate} {'DESC' if descending else 'ASC'}, path"
+        if limit is not None:
+            sql += ' LIMIT ? OFFSET ?'
+            params.extend([int(limit), int(offset)])
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+    
+    def get(self, file_path):
+        """返回单个文件的索引记录，不存在时返回None"""
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM samples WHERE path = ?',
+                                     (os.path.abspath(file_path),)).fetchone()
+        return dict(row) if row is not None else None
+    
+    def remove(self, folder, recursive=True):
+        """删除目录下的所有索引记录，返回删除的行数"""
+        clause, params = self._folder_clause(folder, recursive)
+        with self._lock, self._conn:
+            return self._conn.execute(f'DELETE FROM samples WHERE {clause}', params).rowcount
+    
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM samples').fetchone()[0]
+    
+    def stats(self):
+        """返回文件数、分析失败数和数据库大小"""
+        with self._lock:
+            total, failed = self._conn.execute(
+                'SELECT COUNT(*), COUNT(error) FROM samples'
+            ).fetchone()
+        db_bytes = 0
+        # WAL 模式下尚未合并的写入在 -wal 文件中
+        for path in (self.db_path, self.db_path + '-wal'):
+            try:
+                db_bytes += os.path.getsize(path)
+            except OSError:
+                pass
+        return {'files': total, 'failed': failed, 'db_bytes': db_bytes}
@@ -0,0 +1,168 @@
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils.file_utils import get_audio_files_in_directory
+
+logger = logging.getLogger(__name__)
+
+
+class LibraryLoadTask:
+    """
+    一次后台加载任务的状态
+    
+    回调都在工作线程中调用，GUI 需要自行转发到主线程（例如通过 Qt 信号）:
+        on_sample(音符名, 文件路径, 样本)  每个样本解码完成时
+        on_progress(已完成数, 总数)        每个文件处理完成时（包括失败）
+        on_finished(任务)                  全部完成或取消后
+    """
+    
+    def __init__(self, on_sample=None, on_progress=None, on_finished=None):
+        self.on_sample = on_sample
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        self.total = 0
+        self.done = 0
+        self.loaded = []  # 成功加载的 (音符名, 文件路径)
+        self.failed = []  # 加载失败的 (文件路径, 错误信息)
+        self.result = None  # 索引任务结束后为 LibraryIndex.scan 的统计
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._finished = threading.Event()
+    
+    def cancel(self):
+        """取消尚未开始解码的文件"""
+        self._cancelled.set()
+    
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+    
+    @property
+    def finished(self):
+        return self._finished.is_set()
+    
+    def wait(self, timeout=None):
+        """等待任务结束，返回是否已结束"""
+        return self._finished.wait(timeout)
+    
+    def _call(self, callback, *args):
+        if callback is None:
+            return
+        try:
+            callback(*args)
+        except Exception as e:
+            logger.error(f"样本库加载回调失败: {str(e)}")
+    
+    def _finish(self):
+        self._finished.set()
+        self._call(self.on_finished, self)
+
+
+class LibraryLoader:
+    """
+    后台样本库加载器：在有界线程池中扫描目录并解码样本
+    
+    解码通过 AudioProcessor.load_sample 完成（转换采样率和声道并写入样本缓存），
+    之后播放或导出时 get_sample_map 直接命中缓存。pydub 解码主要耗时在 ffmpeg
+    子进程和数组转换中，线程池即可并行。
+    """
+    
+    def __init__(self, audio_processor, max_workers=4):
+        self.audio_processor = audio_processor
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='library-loader'
+        )
+    
+    def load_directory(self, directory, recursive=False, **callbacks):
+        """
+        在后台扫描目录并加载其中的音频文件，立即返回 LibraryLoadTask
+        
+        参数:
+            directory: 样本目录
+            recursive: 是否包含子目录
+            callbacks: on_sample、on_progress、on_finished，见 LibraryLoadTask
+        """
+        task = LibraryLoadTask(**callbacks)
+        self._executor.submit(self._scan, task, directory, recursive)
+        return task
+    
+    def load_files(self, file_paths, **callbacks):
+        """在后台加载给定的音频文件，立即返回 LibraryLoadTask"""
+        task = LibraryLoadTask(**callbacks)
+        self._submit_files(task, list(file_paths))
+        return task
+    
+    def index_directory(self, index, directory, recursive=True, on_progress=None, on_finished=None):
+        """
+        在后台增量扫描目录并更新样本库索引（LibraryIndex），立即返回 LibraryLoadTask
+        
+        只分析新增或修改的文件，on_progress 收到的是 (已分析数, 需分析总数)，
+        结束后 task.result 为扫描统计。
+        """
+        task = LibraryLoadTask(on_progress=on_progress, on_finished=on_finished)
+        self._executor.submit(self._index, task, index, directory, recursive)
+        return task
+    
+    def shutdown(self, wait=True, cancel_pending=True):
+        """关闭线程池"""
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_pending)
+    
+    def _scan(self, task, directory, recursive):
+        try:
+            files = sorted(get_audio_files_in_directory(directory, recursive))
+        except Exception as e:
+            logger.error(f"扫描样本目录失败: {str(e)}")
+            task.failed.append((directory, str(e)))
+            files = []
+        self._submit_files(task, files)
+    
+    def _index(self, task, index, directory, recursive):
+        def progress(done, total):
+            with task._lock:
+                task.done, task.total = done, total
+            task._call(task.on_progress, done, total)
+        
+        try:
+            task.result = index.scan(directory, recursive, on_progress=progress,
+                                     cancelled=lambda: task.cancelled)
+        except Exception as e:
+            logger.error(f"索引样本目录失败: {str(e)}")
+            task.failed.append((directory, str(e)))
+        finally:
+            task._finish()
+    
+    def _submit_files(self, task, files):
+        with task._lock:
+            task.total = len(files)
+            task._pending = len(files)
+        task._call(task.on_progress, 0, task.total)
+        if not files:
+            task._finish()
+            return
+        for file_path in files:
+            self._executor.submit(self._load_one, task, file_path)
+    
+    def _load_one(self, task, file_path):
+        try:
+            if not task.cancelled:
+                note_name = os.path.splitext(os.path.basename(file_path))[0]
+                try:
+                    sample = self.audio_processor.load_sample(file_path, raise_errors=True)
+                    with task._lock:
+                        task.loaded.append((note_name, file_path))
+                    task._call(task.on_sample, note_name, file_path, sample)
+                except Exception as e:
+                    logger.error(f"加载样本失败 {file_path}: {str(e)}")
+                    with task._lock:
+                        task.failed.append((file_path, str(e)))
+        finally:
+            with task._lock:
+                task.done += 1
+                task._pending -= 1
+                done, total, last = task.done, task.total, task._pending == 0
+            task._call(task.on_progress, done, total)
+            if last:
+                task._finish()
@@ -0,0 +1,154 @@
+import os
+import glob
+import hashlib
+import logging
+import threading
+import numpy as np
+from utils.file_utils import write_atomic
+from .note_table import NOTE_DTYPE
+
+logger = logging.getLogger(__name__)
+
+
+def file_hash(file_path, chunk_size=1024 * 1024):
+    """计算文件内容哈希"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class MidiCache:
+    """
+    MIDI解析结果的磁盘缓存
+    
+    每个条目是一个未压缩的 .npz 文件，包含音符表（结构化数组）、速度表和文件元数据，
+    按文件内容哈希和解析器版本命名。命中时更新文件修改时间，超出容量时按修改时间
+    淘汰最久未使用的条目。
+    """
+    
+    def __init__(self, cache_dir, max_bytes=64 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    @staticmethod
+    def make_key(content_hash, parser_version):
+        """生成缓存键"""
+        return f"{content_hash}-v{parser_version}"
+    
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npz")
+    
+    def get(self, key):
+        """
+        查找缓存，未命中返回None
+        
+        返回:
+            {'notes': 结构化数组, 'tempo_ticks', 'tempo_values',
+             'ticks_per_beat', 'max_time', 'tempo'}
+        """
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                notes = data['notes']
+                if notes.dtype != NOTE_DTYPE:
+                    raise ValueError("音符表格式不匹配")
+                ticks_per_beat, max_time, tempo = data['meta'].tolist()
+                entry = {
+                    'notes': notes,
+                    'tempo_ticks': data['tempo_ticks'],
+                    'tempo_values': data['tempo_values'],
+                    'ticks_per_beat': ticks_per_beat,
+                    'max_time': max_time,
+                    'tempo': tempo
+                }
+            os.utime(path)  # 记录最近使用时间
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except Exception as e:
+            logger.warning(f"读取MIDI缓存失败: {str(e)}")
+            with self._lock:
+                self.misses += 1
+            return None
+        
+        with self._lock:
+            self.hits += 1
+        return entry
+    
+    def put(self, key, notes, tempo_ticks, tempo_values, ticks_per_beat, max_time, tempo):
+        """写入缓存条目并按容量淘汰旧条目"""
+        path = self._path(key)
+        try:
+            write_atomic(path, lambda f: np.savez(
+                f,
+                notes=notes,
+                tempo_ticks=np.asarray(tempo_ticks, dtype=np.int64),
+                tempo_values=np.asarray(tempo_values, dtype=np.int64),
+                meta=np.array([ticks_per_beat, max_time, tempo], dtype=np.int64)
+            ))
+        except Exception as e:
+            logger.warning(f"写入MIDI缓存失败: {str(e)}")
+            return
+        self.evict()
+    
+    def _entries(self):
+        """返回 [(修改时间, 大小, 路径)]，按修改时间从旧到新排序"""
+        entries = []
+        for path in glob.glob(os.path.join(self.cache_dir, '*.npz')):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        return entries
+    
+    def evict(self):
+        """删除最久未使用的条目，直到总大小不超过上限"""
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    self.evictions += 1
+                except FileNotFoundError:
+                    pass
+                total -= size
+    
+    def clear(self):
+        """删除所有缓存文件"""
+        with self._lock:
+            for _, _, path in self._entries():
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+    
+    @property
+    def disk_bytes(self):
+        return sum(size for _, size, _ in self._entries())
+    
+    def stats(self):
+        """返回命中统计"""
+        entries = self._entries()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(entries),
+                'disk_bytes': sum(size for _, size, _ in entries),
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -1,24 +1,73 @@
 import mido
-from collections import defaultdict
+import logging
+from collections import defaultdict, deque
 import numpy as np
+from .tempo_map import TempoMap, DEFAULT_TEMPO
+from .note_table import NoteTable
+from .midi_stream import iter_midi_notes, DEFAULT_CHUNK_SIZE
+from .midi_cache import file_hash
+from .interval_index import IntervalIndex
+
+logger = logging.getLogger(__name__)
+
+# 解析结果格式或配对、换算逻辑变化时递增，使旧的磁盘缓存失效
+PARSER_VERSION = 1
 
 class MidiProcessor:
-    def __init__(self):
-        self.notes = defaultdict(list)
-        self.tempo = 500000  # 默认tempo (120 BPM)
+    def __init__(self, cache=None):
+        """
+        参数:
+            cache: 可选的 MidiCache，命中时跳过解析直接载入音符表
+        """
+        self.cache = cache
+        self.note_table = NoteTable()  # 列式音符表，按解析顺序
+        self.tempo = DEFAULT_TEMPO  # 最后一次 set_tempo 的值
+        self.tempo_map = None  # 解析后生成的速度表
         self.max_time = 0  # 添加最大时间跟踪
-
+        self._interval_index = None
+    
+    @property
+    def notes(self):
+        """按音高分组的音符 {音高: NoteTable}（兼容旧接口）"""
+        return self.note_table.group_by('note')
+    
+    @property
+    def interval_index(self):
+        """音符时间区间索引，编号为 note_table 中的行号（首次访问时建立）"""
+        if self._interval_index is None:
+            self._interval_index = IntervalIndex.from_notes(self.note_table)
+        return self._interval_index
+    
+    def notes_in_range(self, start_sec, end_sec):
+        """返回与 [start_sec, end_sec) 重叠的音符（NoteTable，按解析顺序）"""
+        return self.note_table[self.interval_index.overlap(start_sec, end_sec)]
+    
     def load_midi(self, file_path):
         """加载并解析MIDI文件"""
-        self.notes.clear()
+        self.note_table = NoteTable()
+        self._interval_index = None
         self.max_time = 0  # 重置最大时间
+        self.tempo = DEFAULT_TEMPO
         try:
+            cache_key = None
+            if self.cache is not None:
+                cache_key = self.cache.make_key(file_hash(file_path), PARSER_VERSION)
+                if self._load_cached(cache_key):
+                    return self.notes
+            
             mid = mido.MidiFile(file_path)
             ticks_per_beat = mid.ticks_per_beat
             
+            # 各列先收集到列表中，最后一次性构建音符表
+            pitches, velocities, channels, tracks, starts, ends = [], [], [], [], [], []
+            
             # 解析MIDI消息
-            current_time = 0
-            for track in mid.tracks:
+            # 按 (音轨, 通道, 音高) 记录尚未结束的音符行号，先开始的先结束
+            open_notes = defaultdict(deque)
+            tempo_changes = []
+            for track_index, track in enumerate(mid.tracks):
+                # 每条音轨的 delta 时间从0开始独立累计
+                current_time = 0
                 for msg in track:
                     current_time += msg.time
                     self.max_time = max(self.max_time, current_time)  # 更新最大时间
@@ -26,57 +75,102 @@ class MidiProcessor:
                     # 记录速度变化
                     if msg.type == 'set_tempo':
                         self.tempo = msg.tempo
+                        tempo_changes.append((current_time, msg.tempo))
                     
                     # 记录音符
                     if msg.type == 'note_on' and msg.velocity > 0:
-                        note_info = {
-                            'note': msg.note,
-                            'velocity': msg.velocity,
-                            'start': current_time,
-                            'end': None,
-                            'channel': msg.channel
-                        }
-                        self.notes[msg.note].append(note_info)
+                        open_notes[(track_index, msg.channel, msg.note)].append(len(starts))
+                        pitches.append(msg.note)
+                        velocities.append(msg.velocity)
+                        channels.append(msg.channel)
+                        tracks.append(track_index)
+                        starts.append(current_time)
+                        ends.append(-1)
                     elif msg.type == 'note_off' or (msg.type == 'note_on' and msg.velocity == 0):
-                        # 查找匹配的note_on
-                        for note in self.notes[msg.note]:
-                            # 添加额外检查确保匹配正确的音符
-                            if (isinstance(note, dict) and 
-                                note['end'] is None and 
-                                note['channel'] == msg.channel and
-                                note['start'] <= current_time):
-                                note['end'] = current_time
-                                break
+                        # 匹配最早的未结束note_on，O(1)
+                        pending = open_notes.get((track_index, msg.channel, msg.note))
+                        if pending:
+                            ends[pending.popleft()] = current_time
+            
+            self.note_table = NoteTable.from_columns(
+                note=pitches,
+                velocity=velocities,
+                channel=channels,
+                track=tracks,
+                start=starts,
+                end=ends
+            )
             
             # 计算实际时间（秒）
+            self.tempo_map = TempoMap(ticks_per_beat, tempo_changes)
             self._convert_to_seconds(ticks_per_beat)
             
+            if cache_key is not None:
+                self.cache.put(
+                    cache_key,
+                    self.note_table.data,
+                    self.tempo_map.ticks,
+                    self.tempo_map.tempos,
+                    ticks_per_beat,
+                    self.max_time,
+                    self.tempo
+                )
+            
             return self.notes
         except Exception as e:
             raise RuntimeError(f"MIDI文件解析失败: {str(e)}")
-
+    
+    def _load_cached(self, cache_key):
+        """从磁盘缓存载入解析结果，未命中返回False"""
+        entry = self.cache.get(cache_key)
+        if entry is None:
+            return False
+        self.note_table = NoteTable(entry['notes'])
+        self.tempo_map = TempoMap(
+            entry['ticks_per_beat'],
+            zip(entry['tempo_ticks'].tolist(), entry['tempo_values'].tolist())
+        )
+        self.max_time = entry['max_time']
+        self.tempo = entry['tempo']
+        logger.debug(f"MIDI缓存命中: {cache_key}")
+        return True
+    
     def _convert_to_seconds(self, ticks_per_beat):
-        """将tick时间转换为秒"""
-        microseconds_per_tick = self.tempo / ticks_per_beat
+        """按速度表将tick时间批量转换为秒"""
+        if self.tempo_map is None:
+            self.tempo_map = TempoMap(ticks_per_beat, [(0, self.tempo)])
         
-        for note_list in self.notes.values():
-            for note in note_list:
-                # 跳过非字典项（防止'int' object is not subscriptable错误）
-                if not isinstance(note, dict):
-                    continue
-                
-                # 处理未结束的音符（没有匹配note_off）
-                if note['end'] is None:
-                    note['end'] = self.max_time  # 使用文件最大时间作为结束
-                
-                note['start_sec'] = note['start'] * microseconds_per_tick / 1_000_000
-                note['duration_sec'] = (note['end'] - note['start']) * microseconds_per_tick / 1_000_000
-                note['end_sec'] = note['start_sec'] + note['duration_sec']
+        data = self.note_table.data
+        
+        # 处理未结束的音符（没有匹配note_off）
+        data['end'][data['end'] < 0] = self.max_time  # 使用文件最大时间作为结束
+        
+        data['start_sec'] = self.tempo_map.to_seconds(data['start'])
+        data['end_sec'] = self.tempo_map.to_seconds(data['end'])
+        data['duration_sec'] = data['end_sec'] - data['start_sec']
+    
+    def iter_notes(self, file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        流式解析MIDI文件，按开始时间顺序逐个生成音符字典
+        
+        不修改已加载的音符表，适合超大文件边解析边渲染或显示。
+        """
+        try:
+            yield from iter_midi_notes(file_path, chunk_size)
+        except Exception as e:
+            raise RuntimeError(f"MIDI文件解析失败: {str(e)}")
+    
+    def iter_note_batches(self, file_path, batch_size=4096, chunk_size=DEFAULT_CHUNK_SIZE):
+        """流式解析MIDI文件，每次生成最多 batch_size 个音符的 NoteTable"""
+        batch = []
+        for note in self.iter_notes(file_path, chunk_size):
+            batch.append(note)
+            if len(batch) >= batch_size:
+                yield NoteTable.from_dicts(batch)
+                batch = []
+        if batch:
+            yield NoteTable.from_dicts(batch)
     
     def get_note_list(self):
-        """获取所有音符的列表"""
-        all_notes = []
-        for note_list in self.notes.values():
-            # 过滤掉非字典项
-            all_notes.extend([n for n in note_list if isinstance(n, dict)])
-        return sorted(all_notes, key=lambda x: x['start_sec'])
\ No newline at end of file
+        """获取按开始时间排序的音符表"""
+        return self.note_table.sort('start_sec')
\ No newline at end of file
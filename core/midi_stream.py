@@ -0,0 +1,218 @@
+import heapq
+import struct
+from collections import defaultdict, deque
+from .tempo_map import DEFAULT_TEMPO
+
+# 事件类型
+_NOTE_ON = 0
+_NOTE_OFF = 1
+_TEMPO = 2
+_TRACK_END = 3
+
+# 通道消息（按高4位）与系统消息的数据字节数
+_CHANNEL_DATA_LENGTHS = {0x80: 2, 0x90: 2, 0xA0: 2, 0xB0: 2, 0xC0: 1, 0xD0: 1, 0xE0: 2}
+_SYSTEM_DATA_LENGTHS = {0xF1: 1, 0xF2: 2, 0xF3: 1}
+
+DEFAULT_CHUNK_SIZE = 16384  # 每条音轨的读缓冲大小（字节）
+
+
+def read_track_offsets(f):
+    """
+    读取文件头并定位各音轨块，不读取音轨内容
+    
+    返回:
+        (ticks_per_beat, [(数据起始偏移, 数据长度), ...])
+    """
+    name, size = struct.unpack('>4sL', f.read(8))
+    if name != b'MThd':
+        raise OSError("未找到MThd，可能不是MIDI文件")
+    header = f.read(size)
+    if len(header) < 6:
+        raise EOFError("MIDI文件头不完整")
+    _, num_tracks, ticks_per_beat = struct.unpack('>hhh', header[:6])
+    
+    offsets = []
+    for _ in range(num_tracks):
+        chunk = f.read(8)
+        if len(chunk) < 8:
+            raise EOFError("MIDI音轨数量与文件头不符")
+        name, size = struct.unpack('>4sL', chunk)
+        if name != b'MTrk':
+            raise OSError("音轨起始处没有MTrk")
+        offsets.append((f.tell(), size))
+        f.seek(size, 1)
+    return ticks_per_beat, offsets
+
+
+def iter_track_events(f, track_index, offset, size, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    逐块读取一条音轨，按文件顺序生成与音符相关的事件
+    
+    事件格式: (绝对tick, 音轨序号, 事件类型, 通道, 音高, 力度或tempo)
+    多条音轨共用一个文件对象，每次补充缓冲前重新定位。
+    最后生成一个音轨结束事件，携带该音轨的总tick数。
+    """
+    buf = b''
+    pos = 0
+    file_pos = offset
+    remaining = size
+    tick = 0
+    last_status = None
+    
+    def fill(n):
+        # 保证缓冲中至少还有 n 个字节
+        nonlocal buf, pos, file_pos, remaining
+        while len(buf) - pos < n:
+            if not remaining:
+                raise EOFError("MIDI音轨数据不完整")
+            f.seek(file_pos)
+            data = f.read(min(max(chunk_size, n), remaining))
+            if not data:
+                raise EOFError("MIDI音轨数据不完整")
+            file_pos += len(data)
+            remaining -= len(data)
+            buf = buf[pos:] + data
+            pos = 0
+    
+    def read_varlen():
+        nonlocal pos
+        value = 0
+        while True:
+            fill(1)
+            byte = buf[pos]
+            pos += 1
+            value = (value << 7) | (byte & 0x7F)
+            if byte < 0x80:
+                return value
+    
+    def skip(n):
+        # 跳过 n 个字节，超出缓冲的部分直接移动文件偏移
+        nonlocal buf, pos, file_pos, remaining
+        available = len(buf) - pos
+        if n <= available:
+            pos += n
+            return
+        n -= available
+        if n > remaining:
+            raise EOFError("MIDI音轨数据不完整")
+        buf = b''
+        pos = 0
+        file_pos += n
+        remaining -= n
+    
+    while pos < len(buf) or remaining:
+        tick += read_varlen()
+        fill(1)
+        status = buf[pos]
+        pos += 1
+        
+        if status < 0x80:
+            # 运行状态：该字节是数据字节
+            if last_status is None:
+                raise OSError("运行状态缺少前置状态字节")
+            pos -= 1
+            status = last_status
+        elif status != 0xFF:
+            # 元事件不改变运行状态
+            last_status = status
+        
+        if status == 0xFF:
+            fill(1)
+            meta_type = buf[pos]
+            pos += 1
+            length = read_varlen()
+            if meta_type == 0x51 and length == 3:
+                fill(3)
+                tempo = (buf[pos] << 16) | (buf[pos + 1] << 8) | buf[pos + 2]
+                pos += 3
+                yield (tick, track_index, _TEMPO, 0, 0, tempo)
+            else:
+                skip(length)
+        elif status in (0xF0, 0xF7):
+            skip(read_varlen())
+        elif status >= 0xF0:
+            skip(_SYSTEM_DATA_LENGTHS.get(status, 0))
+        else:
+            kind = status & 0xF0
+            length = _CHANNEL_DATA_LENGTHS[kind]
+            fill(length)
+            if kind == 0x90 or kind == 0x80:
+                note = buf[pos]
+                velocity = buf[pos + 1]
+                if kind == 0x90 and velocity > 0:
+                    yield (tick, track_index, _NOTE_ON, status & 0x0F, note, velocity)
+                else:
+                    yield (tick, track_index, _NOTE_OFF, status & 0x0F, note, velocity)
+            pos += length
+    
+    yield (tick, track_index, _TRACK_END, 0, 0, 0)
+
+
+def iter_midi_notes(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    流式解析MIDI文件，按开始时间顺序逐个生成配对好的音符字典
+    
+    各音轨按绝对tick归并，边读边配对、边换算秒数，不构建完整的消息列表。
+    音符在它之前开始的音符全部结束后才会生成，因此内存占用取决于同时
+    未结束的音符数；没有note_off的音符以文件最大时间结束，会一直保留到文件末尾。
+    生成顺序和字段与 MidiProcessor.get_note_list() 一致。
+    """
+    with open(file_path, 'rb') as f:
+        ticks_per_beat, offsets = read_track_offsets(f)
+        tracks = [
+            iter_track_events(f, track_index, offset, size, chunk_size)
+            for track_index, (offset, size) in enumerate(offsets)
+        ]
+        
+        # 当前速度区间：起点tick、起点累计微秒数、tempo
+        segment_tick = 0
+        segment_us = 0.0
+        tempo = DEFAULT_TEMPO
+        
+        def to_seconds(tick):
+            return (segment_us + (tick - segment_tick) * tempo / ticks_per_beat) / 1_000_000
+        
+        open_notes = defaultdict(deque)  # (音轨, 通道, 音高) -> 未结束的音符
+        ordered = deque()  # 按开始顺序排列、尚未生成的音符
+        max_time = 0
+        
+        for tick, track_index, kind, channel, pitch, value in heapq.merge(*tracks):
+            max_time = max(max_time, tick)
+            if kind == _NOTE_ON:
+                note = {
+                    'note': pitch,
+                    'velocity': value,
+                    'channel': channel,
+                    'track': track_index,
+                    'start': tick,
+                    'end': None,
+                    'start_sec': to_seconds(tick),
+                    'duration_sec': 0.0,
+                    'end_sec': None
+                }
+                open_notes[(track_index, channel, pitch)].append(note)
+                ordered.append(note)
+            elif kind == _NOTE_OFF:
+                pending = open_notes.get((track_index, channel, pitch))
+                if pending:
+                    note = pending.popleft()
+                    note['end'] = tick
+                    note['end_sec'] = to_seconds(tick)
+                    note['duration_sec'] = note['end_sec'] - note['start_sec']
+                    # 生成已经结束的最早音符
+                    while ordered and ordered[0]['end'] is not None:
+                        yield ordered.popleft()
+            elif kind == _TEMPO:
+                segment_us += (tick - segment_tick) * tempo / ticks_per_beat
+                segment_tick = tick
+                tempo = value
+        
+        # 处理未结束的音符（没有匹配note_off）
+        end_sec = to_seconds(max_time)
+        while ordered:
+            note = ordered.popleft()
+            if note['end'] is None:
+                note['end'] = max_time
+                note['end_sec'] = end_sec
+                note['duration_sec'] = end_sec - note['start_sec']
+            yield note
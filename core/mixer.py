@@ -0,0 +1,43 @@
+import numpy as np
+from .pcm import array_to_int16, array_to_segment
+
+
+class MixBus:
+    """预分配的float32混音总线，按整数采样偏移叠加音符"""
+    
+    def __init__(self, length, sample_rate=44100):
+        self.sample_rate = sample_rate
+        self.buffer = np.zeros(max(int(length), 0), dtype=np.float32)
+        self.length = 0  # 实际写入的末尾位置
+    
+    def add(self, samples, offset, length=None):
+        """
+        在指定采样偏移处叠加一段音频
+        
+        length 为音符占用的总长度，samples 不足的部分视为静音，无需额外填充。
+        """
+        offset = int(offset)
+        length = len(samples) if length is None else max(int(length), len(samples))
+        end = offset + length
+        if offset < 0:
+            samples = samples[-offset:]
+            offset = 0
+        if end > len(self.buffer):
+            # 预估长度不足时按倍数扩容，保证总体仍为线性时间
+            grown = np.zeros(max(end, 2 * len(self.buffer)), dtype=np.float32)
+            grown[:len(self.buffer)] = self.buffer
+            self.buffer = grown
+        self.buffer[offset:offset + len(samples)] += samples
+        self.length = max(self.length, end)
+    
+    def to_array(self):
+        """返回已混合部分的float32视图"""
+        return self.buffer[:self.length]
+    
+    def to_int16(self):
+        """一次性转换为int16"""
+        return array_to_int16(self.to_array())
+    
+    def to_segment(self):
+        """转换为AudioSegment"""
+        return array_to_segment(self.to_array(), self.sample_rate)
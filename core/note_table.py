@@ -0,0 +1,211 @@
+import numpy as np
+
+# 每个音符一行的列式存储，约46字节/音符（字典约600字节）
+NOTE_DTYPE = np.dtype([
+    ('note', np.int16),
+    ('velocity', np.uint8),
+    ('channel', np.uint8),
+    ('track', np.int16),
+    ('start', np.int64),
+    ('end', np.int64),
+    ('start_sec', np.float64),
+    ('duration_sec', np.float64),
+    ('end_sec', np.float64),
+])
+NOTE_FIELDS = NOTE_DTYPE.names
+
+
+class NoteView:
+    """
+    音符表中单行的字典式视图，兼容原先的音符字典用法
+    
+    读取返回 Python 标量，写入直接修改所属的音符表。
+    """
+    
+    __slots__ = ('_data', '_index')
+    
+    def __init__(self, data, index):
+        self._data = data
+        self._index = index
+    
+    def __getitem__(self, key):
+        if key not in NOTE_FIELDS:
+            raise KeyError(key)
+        return self._data[key][self._index].item()
+    
+    def __setitem__(self, key, value):
+        if key not in NOTE_FIELDS:
+            raise KeyError(key)
+        self._data[key][self._index] = value
+    
+    def __contains__(self, key):
+        return key in NOTE_FIELDS
+    
+    def __iter__(self):
+        return iter(NOTE_FIELDS)
+    
+    def __len__(self):
+        return len(NOTE_FIELDS)
+    
+    def __eq__(self, other):
+        if isinstance(other, (NoteView, dict)):
+            return self.to_dict() == dict(other.items())
+        return NotImplemented
+    
+    def __repr__(self):
+        return f"NoteView({self.to_dict()})"
+    
+    def get(self, key, default=None):
+        return self[key] if key in NOTE_FIELDS else default
+    
+    def keys(self):
+        return list(NOTE_FIELDS)
+    
+    def values(self):
+        return [self[key] for key in NOTE_FIELDS]
+    
+    def items(self):
+        return [(key, self[key]) for key in NOTE_FIELDS]
+    
+    def to_dict(self):
+        """转换为普通字典"""
+        return dict(zip(NOTE_FIELDS, self._data[self._index].item()))
+
+
+class NoteTable:
+    """
+    列式音符表（NumPy 结构化数组）
+    
+    用法:
+        table['start_sec']        # 整列，ndarray
+        table[0]                  # 单个音符的字典式视图
+        table[mask] / table[1:5]  # 子表
+        for note in table: ...    # 逐个音符的字典式视图
+    """
+    
+    def __init__(self, data=None):
+        self.data = np.zeros(0, dtype=NOTE_DTYPE) if data is None else data
+    
+    @classmethod
+    def from_columns(cls, **columns):
+        """由各列数组创建，未提供的列为0"""
+        length = len(next(iter(columns.values()))) if columns else 0
+        data = np.zeros(length, dtype=NOTE_DTYPE)
+        for name, values in columns.items():
+            data[name] = values
+        return cls(data)
+    
+    @classmethod
+    def from_dicts(cls, notes):
+        """由音符字典列表创建"""
+        notes = list(notes)
+        data = np.zeros(len(notes), dtype=NOTE_DTYPE)
+        for name in NOTE_FIELDS:
+            data[name] = [note.get(name, 0) or 0 for note in notes]
+        return cls(data)
+    
+    @classmethod
+    def concat(cls, tables):
+        """拼接多个音符表"""
+        tables = list(tables)
+        if not tables:
+            return cls()
+        return cls(np.concatenate([table.data for table in tables]))
+    
+    def to_dicts(self):
+        """转换为音符字典列表"""
+        return [dict(zip(NOTE_FIELDS, row)) for row in self.data.tolist()]
+    
+    def __len__(self):
+        return len(self.data)
+    
+    def __iter__(self):
+        data = self.data
+        for index in range(len(data)):
+            yield NoteView(data, index)
+    
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.data[key]
+        if isinstance(key, (int, np.integer)):
+            if key < 0:
+                key += len(self.data)
+            if not 0 <= key < len(self.data):
+                raise IndexError(key)
+            return NoteView(self.data, key)
+        return NoteTable(self.data[key])
+    
+    def __repr__(self):
+        return f"NoteTable({len(self)} notes)"
+    
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+    
+    def sort(self, by='start_sec'):
+        """按指定列稳定排序，返回新表"""
+        return NoteTable(self.data[np.argsort(self.data[by], kind='stable')])
+    
+    def filter(self, mask):
+        """按布尔掩码或索引数组筛选，返回新表"""
+        return NoteTable(self.data[mask])
+    
+    def select(self, start_sec=None, end_sec=None, notes=None, channels=None):
+        """
+        按条件筛选
+        
+        参数:
+            start_sec, end_sec: 只保留与 [start_sec, end_sec) 时间窗重叠的音符
+            notes: 音高集合
+            channels: 通道集合
+        """
+        mask = np.ones(len(self.data), dtype=bool)
+        if start_sec is not None:
+            mask &= self.data['end_sec'] > start_sec
+        if end_sec is not None:
+            mask &= self.data['start_sec'] < end_sec
+        if notes is not None:
+            mask &= np.isin(self.data['note'], list(notes))
+        if channels is not None:
+            mask &= np.isin(self.data['channel'], list(channels))
+        return NoteTable(self.data[mask])
+    
+    def unique(self, column='note'):
+        """返回某列的不重复值（已排序）"""
+        return np.unique(self.data[column])
+    
+    def group_by(self, column='note'):
+        """按列分组，返回 {值: 子表}，组内保持原顺序"""
+        if not len(self.data):
+            return {}
+        order = np.argsort(self.data[column], kind='stable')
+        ordered = self.data[order]
+        values, starts = np.unique(ordered[column], return_index=True)
+        groups = np.split(ordered, starts[1:])
+        return {value: NoteTable(group) for value, group in zip(values.tolist(), groups)}
+    
+    def time_range(self):
+        """返回 (最早开始时间, 最晚结束时间)，空表为 (0, 0)"""
+        if not len(self.data):
+            return 0.0, 0.0
+        return float(self.data['start_sec'].min()), float(self.data['end_sec'].max())
+    
+    def pitch_range(self):
+        """返回 (最低音高, 最高音高)，空表为 (0, 0)"""
+        if not len(self.data):
+            return 0, 0
+        return int(self.data['note'].min()), int(self.data['note'].max())
+
+
+def as_note_table(notes):
+    """将音符字典列表转换为 NoteTable，已是 NoteTable 时原样返回"""
+    if isinstance(notes, NoteTable):
+        return notes
+    return NoteTable.from_dicts(notes or [])
+
+
+def note_column(notes, name, dtype=np.float64):
+    """取音符集合的一列，兼容 NoteTable 和字典列表"""
+    if isinstance(notes, NoteTable):
+        return notes[name]
+    return np.array([note[name] for note in notes], dtype=dtype)
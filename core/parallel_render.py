@@ -0,0 +1,182 @@
+import json
+import time
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, CancelledError, wait
+from multiprocessing import shared_memory
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 工作进程内的全局状态（由 _init_worker 初始化）
+_worker_state = {}
+
+MP_CONTEXT = multiprocessing.get_context('spawn')
+
+
+def job_key(sample, pitch, effects):
+    """不重复的音符渲染任务键：样本、目标音高、效果"""
+    return (id(sample), pitch, json.dumps(effects or {}, sort_keys=True))
+
+
+def pool_config(processor):
+    """进程池创建后固定不变的配置：进程数、采样率、移调质量和移调缓存设置"""
+    cache = processor.pitch_cache
+    return (processor.workers, processor.sample_rate, processor.quality,
+            cache.max_bytes, cache.cache_dir, cache.max_disk_bytes)
+
+
+def create_pool(config):
+    """
+    按 pool_config 返回的配置创建渲染进程池
+    
+    工作进程在多次渲染之间保留，librosa 只导入一次，移调缓存也持续有效；
+    每次渲染的样本通过各自的共享内存传递。
+    """
+    workers, *initargs = config
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=MP_CONTEXT,
+        initializer=_init_worker,
+        initargs=tuple(initargs)
+    )
+
+
+def _init_worker(sample_rate, quality, cache_bytes, cache_dir, disk_bytes):
+    """工作进程初始化：创建独立的 AudioProcessor"""
+    from .audio_processor import AudioProcessor
+    from .pitch_cache import PitchShiftCache
+    
+    _worker_state['shm'] = None
+    _worker_state['processor'] = AudioProcessor(
+        sample_rate,
+        pitch_cache=PitchShiftCache(cache_bytes, cache_dir, disk_bytes),
+        workers=1,
+        quality=quality
+    )
+
+
+def _attach(shm_name):
+    """连接任务所在渲染的共享内存，换到另一次渲染时释放之前连接的那块"""
+    shm = _worker_state['shm']
+    if shm is not None and shm.name == shm_name:
+        return shm
+    if shm is not None:
+        try:
+            shm.close()
+        except BufferError:
+            pass  # 仍有数组引用时交给垃圾回收
+    shm = _worker_state['shm'] = shared_memory.SharedMemory(name=shm_name)
+    return shm
+
+
+def _render_job(job):
+    """
+    在工作进程中执行单个渲染任务
+    
+    返回 (float32数组, 耗时秒数, 阶段统计)，未开启统计时阶段统计为None
+    """
+    from .instrumentation import RenderProfiler, NULL_PROFILER
+    
+    shm_name, (offset, length, sample_hash), pitch, effects, profile = job
+    processor = _worker_state['processor']
+    processor.profiler = RenderProfiler(slowest=0) if profile else NULL_PROFILER
+    start = time.perf_counter()
+    try:
+        # 直接在共享内存上构造视图，无需复制样本
+        samples = np.ndarray((length,), dtype=np.float32,
+                             buffer=_attach(shm_name).buf, offset=offset * 4)
+        processed = processor.process_note_array(samples, pitch, effects, sample_hash)
+    except Exception as e:
+        logger.error(f"并行音符渲染失败: {str(e)}")
+        processed = np.zeros(0, dtype=np.float32)
+    stages = processor.profiler.stages if profile else None
+    return processed, time.perf_counter() - start, stages
+
+
+def _render_chunk(chunk):
+    """在工作进程中依次执行一批渲染任务"""
+    return [_render_job(job) for job in chunk]
+
+
+def render_jobs_parallel(processor, jobs, sample_array, cancelled=None, pool=None,
+                         on_progress=None):
+    """
+    用 processor 的渲染进程池渲染所有不重复的音符任务
+    
+    参数:
+        processor: 发起渲染的 AudioProcessor
+        jobs: {任务键: (样本, 目标音高, 效果, 首个音符)}，见 pitch_bank.plan_jobs
+        sample_array: 将样本转换为 (float32数组, 内容哈希) 的函数
+        cancelled: 可选的 threading.Event，设置后取消尚未开始的任务并尽快返回
+        pool: 使用的进程池，默认为 processor.render_pool
+        on_progress: 可选的进度回调 on_progress(已完成任务数)，每完成一批任务调用一次
+    
+    返回:
+        任务键到已处理float32数组（未调整长度）的字典，取消时只包含已完成的任务
+    
+    异常:
+        BrokenProcessPool: 工作进程异常退出，进程池已不可用
+    
+    processor 开启性能统计时，工作进程内测得的阶段耗时和组合渲染耗时汇总到它的 profiler。
+    """
+    profiler = processor.profiler
+    pool = pool if pool is not None else processor.render_pool
+    # 收集不重复的样本，每个样本只打包一次
+    slots = {}
+    sample_list = []
+    tasks = {}
+    for key, (sample, pitch, effects, *_) in jobs.items():
+        if id(sample) not in slots:
+            slots[id(sample)] = len(sample_list)
+            sample_list.append(sample_array(sample))
+        tasks[key] = (slots[id(sample)], pitch, effects)
+    
+    # 将所有样本的PCM打包进一块共享内存，工作进程直接读取视图
+    layout = []
+    offset = 0
+    for samples, sample_hash in sample_list:
+        layout.append((offset, len(samples), sample_hash))
+        offset += len(samples)
+    
+    shm = shared_memory.SharedMemory(create=True, size=max(offset * 4, 1))
+    try:
+        packed = np.ndarray((offset,), dtype=np.float32, buffer=shm.buf)
+        for (samples, _), (start, length, _) in zip(sample_list, layout):
+            packed[start:start + length] = samples
+        del packed  # 关闭共享内存前必须释放对缓冲区的引用
+        
+        # 每个任务带上所在的共享内存和样本位置，进程池可以同时服务多次渲染
+        work = [(shm.name, layout[slot], pitch, effects, profiler.enabled)
+                for slot, pitch, effects in tasks.values()]
+        chunksize = max(1, len(work) // (processor.workers * 4))
+        futures = [pool.submit(_render_chunk, work[i:i + chunksize])
+                   for i in range(0, len(work), chunksize)]
+        keys = iter(tasks.keys())
+        rendered = {}
+        try:
+            for future in futures:
+                try:
+                    results = future.result()
+                except CancelledError:
+                    break  # 进程池已被 close() 关闭，剩余任务由调用方串行渲染
+                for processed, seconds, stages in results:
+                    key = next(keys)
+                    rendered[key] = processed
+                    if stages is not None:
+                        profiler.merge(stages)
+                        profiler.record_note(jobs[key][3], seconds)
+                if on_progress is not None:
+                    on_progress(len(rendered))
+                if cancelled is not None and cancelled.is_set():
+                    break
+        finally:
+            # 取消或出错时撤回尚未开始的任务，等待已开始的任务结束后才能释放共享内存
+            for future in futures:
+                future.cancel()
+            # 已撤回的任务不会再执行，也不会被标记为完成，只等待已开始的任务
+            wait([future for future in futures if not future.cancelled()])
+        return rendered
+    finally:
+        shm.close()
+        shm.unlink()
@@ -0,0 +1,34 @@
+import numpy as np
+from pydub import AudioSegment
+
+
+def segment_to_array(audio):
+    """将AudioSegment转换为float32单声道数组（范围[-1, 1]）"""
+    samples = np.array(audio.get_array_of_samples())
+    samples = samples.astype(np.float32) / float(2 ** (8 * audio.sample_width - 1))
+    if audio.channels > 1:
+        # 多声道时取平均混为单声道
+        samples = samples.reshape(-1, audio.channels).mean(axis=1)
+    return samples
+
+
+def array_to_int16(samples):
+    """将float32数组限幅并转换为int16"""
+    clipped = np.clip(samples, -1.0, 32767.0 / 32768.0)
+    return (clipped * 32768.0).astype(np.int16)
+
+
+def array_to_pcm24(samples):
+    """将float32数组限幅并转换为24位精度的int32（低8位为0，供 libsndfile 写入 PCM_24）"""
+    clipped = np.clip(samples.astype(np.float64), -1.0, 8388607.0 / 8388608.0)
+    return (clipped * 8388608.0).astype(np.int32) << 8
+
+
+def array_to_segment(samples, sample_rate):
+    """将float32单声道数组转换为16位AudioSegment"""
+    return AudioSegment(
+        array_to_int16(samples).tobytes(),
+        frame_rate=sample_rate,
+        sample_width=2,
+        channels=1
+    )
@@ -0,0 +1,84 @@
+import numpy as np
+from .parallel_render import job_key
+
+
+def plan_jobs(notes, resolved):
+    """
+    列出渲染所需的不重复 (样本, 目标音高, 效果) 组合
+    
+    参数:
+        notes: 音符列表或 NoteTable
+        resolved: 与 notes 一一对应的 (样本, 效果) 列表
+    
+    返回:
+        按首次出现顺序排列的字典 {任务键: (样本, 目标音高, 效果, 首个音符)}
+    """
+    jobs = {}
+    for note, (sample, effects) in zip(notes, resolved):
+        key = job_key(sample, note['note'], effects)
+        if key not in jobs:
+            jobs[key] = (sample, note['note'], effects, note)
+    return jobs
+
+
+class PitchBank:
+    """
+    移调样本库：每个 (样本, 目标音高, 效果) 组合只渲染一次
+    
+    值为已移调并应用效果、未调整长度的只读float32数组，混音时按音符时长切片即可。
+    任务键包含样本对象的 id，库中保留样本的引用，保证键在库的生命周期内不被复用。
+    """
+    
+    def __init__(self):
+        self._entries = {}  # 任务键 -> float32数组
+        self._samples = {}  # id(样本) -> 样本
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def __contains__(self, key):
+        return key in self._entries
+    
+    def __getitem__(self, key):
+        return self._entries[key]
+    
+    def keys(self):
+        return self._entries.keys()
+    
+    def add(self, key, sample, processed):
+        """写入一个渲染结果"""
+        # 只读视图不影响原数组（可能是样本本身或移调缓存中的数组）
+        processed = np.asarray(processed, dtype=np.float32).view()
+        processed.flags.writeable = False
+        self._entries[key] = processed
+        self._samples[id(sample)] = sample
+    
+    def get(self, sample, pitch, effects=None):
+        """查找样本在目标音高和效果下的渲染结果，不存在时返回None"""
+        return self._entries.get(job_key(sample, pitch, effects))
+    
+    def missing(self, jobs):
+        """返回计划中尚未渲染的任务"""
+        return {key: job for key, job in jobs.items() if key not in self._entries}
+    
+    @property
+    def nbytes(self):
+        # 缓存命中的数组可能被多个键共享，只计一次
+        unique = {}
+        for processed in self._entries.values():
+            base = processed.base if processed.base is not None else processed
+            unique[id(base)] = processed.nbytes
+        return sum(unique.values())
+    
+    def clear(self):
+        """清空样本库"""
+        self._entries.clear()
+        self._samples.clear()
+    
+    def stats(self):
+        """返回条目数、样本数和内存占用"""
+        return {
+            'entries': len(self._entries),
+            'samples': len(self._samples),
+            'memory_bytes': self.nbytes
+        }
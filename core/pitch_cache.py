@@ -0,0 +1,175 @@
+import os
+import glob
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+from utils.file_utils import write_atomic
+
+logger = logging.getLogger(__name__)
+
+DISK_EVICT_RATIO = 0.9  # 磁盘缓存超出上限时淘汰到上限的这一比例
+
+
+def array_hash(samples):
+    """计算float32样本数组的内容哈希"""
+    samples = np.ascontiguousarray(samples, dtype=np.float32)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{len(samples)}:".encode())
+    h.update(samples.data)
+    return h.hexdigest()
+
+
+class PitchShiftCache:
+    """
+    移调结果缓存：按内存大小限制的LRU，可选落盘
+    
+    磁盘缓存同样有容量上限（max_disk_bytes），命中时更新文件修改时间，
+    超出上限时按修改时间删除最久未使用的 .npy。
+    """
+    
+    def __init__(self, max_bytes=256 * 1024 * 1024, cache_dir=None,
+                 max_disk_bytes=1024 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._disk_bytes = 0  # 磁盘缓存大小的估计值，超出上限时重新统计
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+    
+    @staticmethod
+    def make_key(sample_hash, semitones, sample_rate, quality):
+        """生成缓存键"""
+        return (sample_hash, float(semitones), int(sample_rate), quality)
+    
+    def _disk_path(self, key):
+        digest = hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.npy")
+    
+    def get(self, key):
+        """查找缓存，未命中返回None"""
+        with self._lock:
+            samples = self._entries.get(key)
+            if samples is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return samples
+        
+        # 内存未命中时尝试磁盘缓存
+        if self.cache_dir:
+            path = self._disk_path(key)
+            if os.path.exists(path):
+                try:
+                    samples = np.load(path)
+                    os.utime(path)  # 记录最近使用时间
+                    with self._lock:
+                        self.disk_hits += 1
+                    self._store(key, samples)
+                    return samples
+                except Exception as e:
+                    logger.warning(f"读取移调磁盘缓存失败: {str(e)}")
+        
+        with self._lock:
+            self.misses += 1
+        return None
+    
+    def put(self, key, samples):
+        """写入缓存"""
+        samples = np.ascontiguousarray(samples, dtype=np.float32)
+        if self.cache_dir:
+            over_limit = False
+            try:
+                write_atomic(self._disk_path(key), lambda f: np.save(f, samples))
+                with self._lock:
+                    self._disk_bytes += samples.nbytes
+                    over_limit = self._disk_bytes > self.max_disk_bytes
+            except Exception as e:
+                logger.warning(f"写入移调磁盘缓存失败: {str(e)}")
+            if over_limit:
+                self.evict_disk()
+        return self._store(key, samples)
+    
+    def _disk_entries(self):
+        """返回磁盘缓存 [(修改时间, 大小, 路径)]，按修改时间从旧到新排序"""
+        entries = []
+        for path in glob.glob(os.path.join(self.cache_dir, '*.npy')):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        return entries
+    
+    def evict_disk(self):
+        """删除最久未使用的磁盘缓存文件，直到总大小不超过上限的九成"""
+        if not self.cache_dir:
+            return
+        # 留出一成余量，避免缓存写满后每次写入都重新扫描目录
+        target = self.max_disk_bytes * DISK_EVICT_RATIO
+        with self._lock:
+            entries = self._disk_entries()
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    self.disk_evictions += 1
+                except FileNotFoundError:
+                    pass
+                total -= size
+            self._disk_bytes = total
+    
+    def _store(self, key, samples):
+        samples.flags.writeable = False  # 缓存内容共享，禁止修改
+        if samples.nbytes > self.max_bytes:
+            return samples
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._entries[key] = samples
+            self._bytes += samples.nbytes
+            # 超出内存限制时淘汰最久未使用的条目
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+        return samples
+    
+    def clear(self):
+        """清空内存缓存（不删除磁盘文件）"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    @property
+    def memory_bytes(self):
+        return self._bytes
+    
+    def stats(self):
+        """返回命中统计"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'disk_evictions': self.disk_evictions,
+                'entries': len(self._entries),
+                'memory_bytes': self._bytes,
+                'disk_bytes': self._disk_bytes,
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0
+            }
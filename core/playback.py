@@ -0,0 +1,440 @@
+import time
+import logging
+import threading
+import numpy as np
+import soundfile as sf
+from .pitch_bank import PitchBank
+
+logger = logging.getLogger(__name__)
+
+# 播放状态
+STATE_STOPPED = 'stopped'
+STATE_PLAYING = 'playing'
+STATE_FINISHED = 'finished'
+
+
+class RingBuffer:
+    """
+    单生产者、单消费者的float32环形缓冲区
+    
+    生产者只修改写位置，消费者只修改读位置，数据写完后才发布新位置，
+    读写两端都不需要加锁，音频回调不会因为渲染线程而阻塞。
+    """
+    
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self._buffer = np.zeros(self.capacity, dtype=np.float32)
+        self._write_pos = 0  # 累计写入的采样数，只由生产者修改
+        self._read_pos = 0  # 累计读取的采样数，只由消费者修改
+    
+    @property
+    def available(self):
+        """可读取的采样数"""
+        return self._write_pos - self._read_pos
+    
+    @property
+    def free(self):
+        """可写入的采样数"""
+        return self.capacity - self.available
+    
+    def write(self, samples):
+        """写入尽可能多的采样，返回实际写入数（缓冲区满时少于 len(samples)）"""
+        count = min(len(samples), self.free)
+        if count <= 0:
+            return 0
+        start = self._write_pos % self.capacity
+        first = min(count, self.capacity - start)
+        self._buffer[start:start + first] = samples[:first]
+        self._buffer[:count - first] = samples[first:count]
+        self._write_pos += count
+        return count
+    
+    def read(self, out):
+        """读取到 out 的开头，返回实际读取数（数据不足时少于 len(out)）"""
+        count = min(len(out), self.available)
+        if count <= 0:
+            return 0
+        start = self._read_pos % self.capacity
+        first = min(count, self.capacity - start)
+        out[:first] = self._buffer[start:start + first]
+        out[first:count] = self._buffer[:count - first]
+        self._read_pos += count
+        return count
+
+
+class OutputSink:
+    """
+    输出后端接口
+    
+    start(callback) 后由后端按自己的节奏调用 callback(帧数) 拉取音频，
+    callback 返回 (float32数组, 是否已结束)。未结束时数组长度等于帧数，
+    最后一块可能更短，结束后后端自行停止。
+    realtime 为False的后端不受声卡时钟约束，回调会等到渲染跟上后再返回数据。
+    """
+    realtime = True
+    
+    def __init__(self, sample_rate=44100, block_frames=512):
+        self.sample_rate = sample_rate
+        self.block_frames = block_frames
+    
+    @property
+    def running(self):
+        raise NotImplementedError
+    
+    def start(self, callback):
+        raise NotImplementedError
+    
+    def stop(self):
+        raise NotImplementedError
+
+
+class ThreadSink(OutputSink):
+    """
+    在后台线程中模拟音频设备回调的输出后端
+    
+    realtime 为True时按采样率定时拉取（与声卡节奏一致），用于测试延迟和欠载；
+    为False时尽快拉取，每次回调等待渲染线程准备好数据，输出与离线渲染一致。
+    子类通过 process(block) 处理每块数据。
+    """
+    
+    def __init__(self, sample_rate=44100, block_frames=512, realtime=True):
+        super().__init__(sample_rate, block_frames)
+        self.realtime = realtime
+        self.callbacks = 0
+        self.late_callbacks = 0  # 实时模式下错过截止时间的回调次数
+        self._thread = None
+        self._stop = threading.Event()
+    
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self, callback):
+        if self.running:
+            return
+        self._stop.clear()
+        self.open()
+        self._thread = threading.Thread(target=self._run, args=(callback,),
+                                        name=type(self).__name__, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+    
+    def wait(self, timeout=None):
+        """等待后端停止（播放结束或 stop），返回是否已停止"""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+    
+    def _run(self, callback):
+        period = self.block_frames / self.sample_rate
+        deadline = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                block, finished = callback(self.block_frames)
+                self.callbacks += 1
+                self.process(block)
+                if finished:
+                    break
+                if self.realtime:
+                    deadline += period
+                    delay = deadline - time.perf_counter()
+                    if delay > 0:
+                        self._stop.wait(delay)
+                    else:
+                        self.late_callbacks += 1
+        except Exception as e:
+            logger.error(f"音频输出失败: {str(e)}")
+        finally:
+            self.close()
+    
+    def open(self):
+        """开始输出前调用"""
+    
+    def process(self, block):
+        """处理一块输出数据"""
+    
+    def close(self):
+        """输出结束后在后端线程中调用"""
+
+
+class NullSink(ThreadSink):
+    """丢弃输出的后端，只统计帧数，用于无音频设备时测试"""
+    
+    def __init__(self, sample_rate=44100, block_frames=512, realtime=True):
+        super().__init__(sample_rate, block_frames, realtime)
+        self.frames = 0
+    
+    def process(self, block):
+        self.frames += len(block)
+
+
+class FileSink(ThreadSink):
+    """将输出写入音频文件的后端，可以检查播放内容（包括欠载造成的静音）"""
+    
+    def __init__(self, file_path, sample_rate=44100, block_frames=512, realtime=True,
+                 subtype='FLOAT'):
+        super().__init__(sample_rate, block_frames, realtime)
+        self.file_path = file_path
+        self.subtype = subtype
+        self.frames = 0
+        self._file = None
+    
+    def open(self):
+        self._file = sf.SoundFile(self.file_path, 'w', samplerate=self.sample_rate,
+                                  channels=1, subtype=self.subtype)
+    
+    def process(self, block):
+        self._file.write(block)
+        self.frames += len(block)
+    
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SoundDeviceSink(OutputSink):
+    """通过 sounddevice（PortAudio）输出到声卡，需要安装 sounddevice"""
+    
+    def __init__(self, sample_rate=44100, block_frames=512, device=None):
+        super().__init__(sample_rate, block_frames)
+        self.device = device
+        self._stream = None
+    
+    @staticmethod
+    def available():
+        """sounddevice 是否可用"""
+        try:
+            import sounddevice  # noqa: F401
+            return True
+        except Exception:
+            return False
+    
+    @property
+    def running(self):
+        return self._stream is not None and self._stream.active
+    
+    def start(self, callback):
+        import sounddevice as sd
+        
+        def audio_callback(outdata, frames, time_info, status):
+            block, finished = callback(frames)
+            outdata[:len(block), 0] = block
+            outdata[len(block):] = 0
+            if finished:
+                raise sd.CallbackStop()
+        
+        if self._stream is not None:
+            self._stream.close()
+        self._stream = sd.OutputStream(samplerate=self.sample_rate, blocksize=self.block_frames,
+                                       channels=1, dtype='float32', device=self.device,
+                                       callback=audio_callback)
+        self._stream.start()
+    
+    def stop(self):
+        if self._stream is not None:
+            self._stream.abort()
+            self._stream.close()
+            self._stream = None
+
+
+def default_sink(sample_rate=44100, block_frames=512):
+    """返回声卡输出后端，sounddevice 不可用时返回None"""
+    if SoundDeviceSink.available():
+        return SoundDeviceSink(sample_rate, block_frames)
+    return None
+
+
+class _Stream:
+    """一次从某个位置开始的播放：环形缓冲区和填充它的渲染线程"""
+    
+    def __init__(self, start_frame, capacity):
+        self.start_frame = start_frame
+        self.ring = RingBuffer(capacity)
+        self.played = 0  # 已输出的帧数
+        self.finished = False  # 渲染线程已写完所有数据
+        self.cancelled = threading.Event()
+        self.data_ready = threading.Event()  # 渲染线程写入数据或结束时设置
+        self.thread = None
+        self.started_at = time.perf_counter()
+        self.first_block_latency = None  # 从开始到第一块写入缓冲区的时间
+
+
+class PlaybackEngine:
+    """
+    实时播放引擎
+    
+    渲染线程通过 AudioProcessor.render_blocks 逐块渲染并写入无锁环形缓冲区，
+    输出后端的回调从缓冲区读取，第一块渲染完成即可开始播放。
+    缓冲区数据不足时输出静音并记为欠载；非实时后端（如 realtime=False 的 FileSink）
+    则等待渲染线程，只在结尾补齐最后一块。
+    stop 和 seek 立即生效：回调每次都读取当前的播放流，定位时直接换成新的流。
+    """
+    
+    def __init__(self, audio_processor, sink=None, block_size=2048, buffer_sec=1.0):
+        self.audio_processor = audio_processor
+        self.sample_rate = audio_processor.sample_rate
+        self.sink = sink if sink is not None else NullSink(self.sample_rate)
+        self.block_size = block_size  # 渲染块大小
+        self.capacity = max(int(buffer_sec * self.sample_rate), block_size)
+        self.on_finished = None  # 播放到结尾时在后端线程中调用
+        self.underruns = 0
+        self.underrun_frames = 0
+        self._source = None  # (notes, samples, effects_map, bank)
+        self._stream = None
+    
+    @property
+    def state(self):
+        stream = self._stream
+        if stream is None:
+            return STATE_STOPPED
+        if stream.finished and not stream.ring.available and not self.sink.running:
+            return STATE_FINISHED
+        return STATE_PLAYING
+    
+    @property
+    def position(self):
+        """当前播放位置（秒）"""
+        stream = self._stream
+        if stream is None:
+            return 0.0
+        return (stream.start_frame + stream.played) / self.sample_rate
+    
+    @property
+    def first_block_latency(self):
+        """最近一次开始或定位后第一块数据就绪的耗时（秒）"""
+        stream = self._stream
+        return stream.first_block_latency if stream is not None else None
+    
+    def play(self, notes, samples, effects_map=None, start_sec=0.0, bank=None):
+        """
+        从 start_sec 开始播放，立即返回，正在播放时先停止
+        
+        移调样本库在渲染过程中按需填充，定位后重新渲染时直接复用。
+        """
+        self.stop()
+        bank = bank if bank is not None else PitchBank()
+        self._source = (notes, samples, effects_map, bank)
+        self.underruns = 0
+        self.underrun_frames = 0
+        self._start_stream(start_sec)
+        self.sink.start(self._pull)
+    
+    def seek(self, position_sec):
+        """跳转到指定位置并从新位置继续播放（停止状态下无效）"""
+        old = self._stream
+        if old is None:
+            return
+        self._start_stream(position_sec)
+        if old is not None:
+            old.cancelled.set()
+            old.data_ready.set()
+        if not self.sink.running:
+            self.sink.start(self._pull)
+    
+    def stop(self):
+        """
+        立即停止播放
+        
+        只通知渲染线程停止而不等待它退出，多进程预渲染样本库期间调用也不会阻塞界面；
+        渲染线程在下一块之前或当前批次的并行任务完成后退出。
+        """
+        stream = self._stream
+        self._stream = None
+        if stream is not None:
+            stream.cancelled.set()
+            stream.data_ready.set()
+        self.sink.stop()
+    
+    def stats(self):
+        """返回播放统计"""
+        stream = self._stream
+        return {
+            'state': self.state,
+            'position_sec': self.position,
+            'buffered_frames': stream.ring.available if stream is not None else 0,
+            'first_block_latency': self.first_block_latency,
+            'underruns': self.underruns,
+            'underrun_frames': self.underrun_frames
+        }
+    
+    def _start_stream(self, start_sec):
+        start_frame = max(int(round(start_sec * self.sample_rate)), 0)
+        stream = _Stream(start_frame, self.capacity)
+        stream.thread = threading.Thread(target=self._produce, args=(stream,),
+                                         name='playback-render', daemon=True)
+        # 替换引用即完成切换，回调下一次读取时就会使用新的流
+        self._stream = stream
+        stream.thread.start()
+    
+    def _produce(self, stream):
+        """渲染线程：逐块渲染并写入环形缓冲区，缓冲区满时等待"""
+        notes, samples, effects_map, bank = self._source
+        wait = self.block_size / self.sample_rate / 4
+        blocks = self.audio_processor.render_blocks(
+            notes, samples, effects_map, self.block_size, bank=bank,
+            start_sec=stream.start_frame / self.sample_rate, cancelled=stream.cancelled
+        )
+        try:
+            for block in blocks:
+                written = 0
+                while written < len(block):
+                    if stream.cancelled.is_set():
+                        return
+                    written += stream.ring.write(block[written:])
+                    stream.data_ready.set()
+                    if stream.first_block_latency is None:
+                        stream.first_block_latency = time.perf_counter() - stream.started_at
+                    if written < len(block):
+                        stream.cancelled.wait(wait)
+        except Exception as e:
+            logger.error(f"播放渲染失败: {str(e)}")
+        finally:
+            blocks.close()
+            stream.finished = True
+            stream.data_ready.set()
+    
+    def _wait_for_data(self, frames):
+        """非实时后端：等到当前播放流有足够数据或渲染结束，返回该播放流"""
+        while True:
+            stream = self._stream
+            if stream is None or stream.finished or stream.ring.available >= frames:
+                return stream
+            # 先清除再检查，避免错过清除前刚写入的数据或刚发出的停止
+            stream.data_ready.clear()
+            if stream.cancelled.is_set():
+                continue  # 已停止或定位，重新读取当前播放流
+            if stream.finished or stream.ring.available >= frames:
+                return stream
+            stream.data_ready.wait()
+    
+    def _pull(self, frames):
+        """输出后端回调：从当前播放流读取，不足部分补静音"""
+        out = np.zeros(frames, dtype=np.float32)
+        stream = self._stream if self.sink.realtime else self._wait_for_data(frames)
+        if stream is None:
+            return out, True
+        if stream.first_block_latency is None and not stream.finished:
+            # 第一块渲染完成前输出静音，不计为欠载
+            return out, False
+        count = stream.ring.read(out)
+        stream.played += count
+        if count < frames:
+            # 先读 finished 再确认缓冲区为空，避免漏掉渲染线程最后写入的数据
+            if stream.finished and not stream.ring.available:
+                if stream is self._stream and self.on_finished is not None:
+                    try:
+                        self.on_finished()
+                    except Exception as e:
+                        logger.error(f"播放结束回调失败: {str(e)}")
+                return out[:count], True
+            self.underruns += 1
+            self.underrun_frames += frames - count
+        return out, False
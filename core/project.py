@@ -1,17 +1,38 @@
+from .note_table import NoteTable, as_note_table
+from .interval_index import IntervalIndex
+
 class Project:
     def __init__(self):
-        self.notes = []
+        self.notes = NoteTable()
         self.samples = {}  # 音符到样本路径的映射
         self.default_sample = None
         self.effects = {}  # 音符到效果设置的映射
+        self._interval_index = None
+        self._indexed_notes = None
     
     def set_notes(self, notes):
-        """设置音符数据"""
-        self.notes = notes
+        """设置音符数据（音符字典列表会转换为 NoteTable）"""
+        self.notes = as_note_table(notes)
+    
+    @property
+    def interval_index(self):
+        """音符时间区间索引，编号为 notes 中的行号（notes 被替换后自动重建）"""
+        if self._interval_index is None or self._indexed_notes is not self.notes:
+            self._interval_index = IntervalIndex.from_notes(self.notes)
+            self._indexed_notes = self.notes
+        return self._interval_index
+    
+    def notes_in_range(self, start_sec, end_sec):
+        """返回与 [start_sec, end_sec) 重叠的音符（NoteTable）"""
+        return self.notes[self.interval_index.overlap(start_sec, end_sec)]
+    
+    def notes_at(self, time_sec):
+        """返回在指定时间发声的音符（NoteTable）"""
+        return self.notes[self.interval_index.at(time_sec)]
     
     def get_note_list(self):
         """获取音符列表"""
-        return self.notes if hasattr(self, 'notes') else []
+        return self.notes if hasattr(self, 'notes') else NoteTable()
     
     def add_sample(self, note_name, file_path):
         """添加样本"""
@@ -0,0 +1,217 @@
+import os
+import copy
+import time
+import logging
+import threading
+from .export import SUBTYPE_PCM_16
+from .note_table import NoteTable
+
+logger = logging.getLogger(__name__)
+
+# 任务状态
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+
+
+class RenderCancelled(Exception):
+    """渲染任务被取消"""
+
+
+class RenderJob:
+    """
+    一次渲染导出任务，与界面无关，可以在任意线程中运行
+    
+    音符、样本和效果在创建任务时确定，之后编辑项目不影响正在进行的渲染。
+    多进程模式下先并行渲染移调样本库，这一阶段按已完成的 (样本, 音高, 效果) 组合数计算进度，
+    之后按已进入混音的音符数计算；取消是协作式的，渲染线程在每批组合完成后和取下一个音符时检查，
+    取消或失败时删除未写完的文件。
+    
+    用法:
+        job = RenderJob('out.wav', notes, samples, effects_map)
+        job.run(processor, on_progress=lambda job: print(job.progress, job.eta))
+    """
+    
+    def __init__(self, file_path, notes, samples, effects_map=None, subtype=SUBTYPE_PCM_16,
+                 file_format=None, block_size=65536, preview=False):
+        self.file_path = file_path
+        self.preview = preview  # 试听任务：渲染到临时文件后交给播放器，而不是导出
+        if isinstance(notes, NoteTable):
+            self.notes = notes.sort('start_sec')
+        else:
+            self.notes = sorted(notes, key=lambda note: note['start_sec'])
+        self.samples = dict(samples)
+        self.effects_map = copy.deepcopy(effects_map or {})
+        self.subtype = subtype
+        self.file_format = file_format
+        self.block_size = block_size
+        self.state = JOB_PENDING
+        self.notes_done = 0
+        self.pairs_done = 0  # 移调样本库中已渲染的组合数
+        self.total_pairs = 0  # 需要渲染的组合数，串行渲染时为0
+        self.frames = 0
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._phase_started = None  # 当前阶段（样本库或混音）开始的时间
+        self._last_report = 0.0
+        self._original_stat = None  # 开始前输出路径上已有文件的状态
+        self._cancelled = threading.Event()
+    
+    @property
+    def total_notes(self):
+        return len(self.notes)
+    
+    @property
+    def rendering_bank(self):
+        """是否正在渲染移调样本库"""
+        return self.state == JOB_RUNNING and self.pairs_done < self.total_pairs
+    
+    @property
+    def done(self):
+        """当前阶段已完成的数量：渲染样本库时为组合数，之后为音符数"""
+        return self.pairs_done if self.rendering_bank else self.notes_done
+    
+    @property
+    def total(self):
+        """当前阶段的总数"""
+        return self.total_pairs if self.rendering_bank else self.total_notes
+    
+    @property
+    def progress(self):
+        """当前阶段的完成比例 0.0-1.0"""
+        if self.state == JOB_DONE:
+            return 1.0
+        return self.done / self.total if self.total else 0.0
+    
+    @property
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.perf_counter()) - self.started_at
+    
+    @property
+    def eta(self):
+        """
+        按当前阶段的平均速度估计的剩余秒数，尚无进度时返回None
+        
+        渲染样本库期间只估计样本库剩余的时间，之后的混音只需切片叠加，耗时很少。
+        """
+        if self.state != JOB_RUNNING or self._phase_started is None:
+            return None
+        if self.rendering_bank:
+            done, remaining = self.pairs_done, self.total_pairs - self.pairs_done
+        else:
+            done, remaining = self.notes_done, self.total_notes - self.notes_done
+        if not done:
+            return None
+        return (time.perf_counter() - self._phase_started) / done * remaining
+    
+    def cancel(self):
+        """请求取消，渲染线程会在处理下一个音符前停止"""
+        self._cancelled.set()
+    
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+    
+    def _report(self, on_progress, interval):
+        """距上次回调超过 interval 秒时回调进度"""
+        now = time.perf_counter()
+        if on_progress is not None and now - self._last_report >= interval:
+            self._last_report = now
+            on_progress(self)
+    
+    def _bank_progress(self, on_progress, interval):
+        """样本库渲染进度回调"""
+        def report(done, total):
+            self.pairs_done = done
+            self.total_pairs = total
+            self._report(on_progress, interval)
+        return report
+    
+    def _iter_notes(self, on_progress, interval):
+        """逐个交给渲染器的音符，同时更新进度并检查取消"""
+        self._phase_started = time.perf_counter()
+        for note in self.notes:
+            if self._cancelled.is_set():
+                raise RenderCancelled()
+            yield note
+            self.notes_done += 1
+            self._report(on_progress, interval)
+    
+    def run(self, audio_processor, on_progress=None, progress_interval=0.1):
+        """
+        执行渲染，返回写入的采样帧数
+        
+        参数:
+            audio_processor: 使用的 AudioProcessor
+            on_progress: 进度回调 on_progress(任务)，在渲染线程中调用，
+                         最多每 progress_interval 秒一次，结束前再调用一次
+        异常:
+            RenderCancelled: 任务被取消
+            其他异常: 渲染或写入失败
+        """
+        self.state = JOB_RUNNING
+        self.started_at = time.perf_counter()
+        self._original_stat = self._file_stat()
+        try:
+            if self._cancelled.is_set():
+                raise RenderCancelled()
+            # 多进程模式下先并行渲染移调样本库，之后的混音只需切片
+            bank = None
+            if audio_processor.workers > 1:
+                self._phase_started = time.perf_counter()
+                bank = audio_processor.build_pitch_bank(
+                    self.notes, self.samples, self.effects_map,
+                    cancelled=self._cancelled,
+                    on_progress=self._bank_progress(on_progress, progress_interval)
+                )
+                if self._cancelled.is_set():
+                    raise RenderCancelled()
+            # 已排序的音符以迭代器形式交给 render_blocks，边取音符边统计进度
+            self.frames = audio_processor.render_to_file(
+                self.file_path,
+                self._iter_notes(on_progress, progress_interval),
+                self.samples,
+                self.effects_map,
+                self.block_size,
+                self.subtype,
+                self.file_format,
+                bank=bank
+            )
+            self.state = JOB_DONE
+            return self.frames
+        except RenderCancelled:
+            self.state = JOB_CANCELLED
+            self._remove_partial()
+            raise
+        except Exception as e:
+            self.state = JOB_FAILED
+            self.error = str(e)
+            logger.error(f"渲染任务失败 {self.file_path}: {str(e)}")
+            self._remove_partial()
+            raise
+        finally:
+            self.finished_at = time.perf_counter()
+            if on_progress is not None:
+                on_progress(self)
+    
+    def _file_stat(self):
+        try:
+            stat = os.stat(self.file_path)
+            return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+    
+    def _remove_partial(self):
+        # 只删除本次渲染写过的文件，打开输出文件之前出错时保留原有文件
+        current = self._file_stat()
+        if current is None or current == self._original_stat:
+            return
+        try:
+            os.remove(self.file_path)
+        except OSError as e:
+            logger.warning(f"删除未完成的文件失败: {str(e)}")
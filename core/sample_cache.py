@@ -0,0 +1,110 @@
+import os
+import threading
+from collections import OrderedDict
+
+
+class SampleCache:
+    """
+    解码后样本的内存缓存：按内存大小限制的LRU
+    
+    键包含文件的绝对路径、修改时间、大小以及目标采样率和声道数，
+    文件被修改后键随之变化，旧版本的解码结果在写入新版本时删除。
+    """
+    
+    def __init__(self, max_bytes=512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # 键 -> AudioSegment
+        self._by_path = {}  # 绝对路径 -> 该文件的所有键
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    @staticmethod
+    def make_key(file_path, sample_rate, channels):
+        """根据文件当前状态生成缓存键，文件不存在时抛出 OSError"""
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        return (path, stat.st_mtime_ns, stat.st_size, int(sample_rate), int(channels))
+    
+    @staticmethod
+    def _size(audio):
+        return len(audio.raw_data)
+    
+    def get(self, key):
+        """查找缓存，未命中返回None"""
+        with self._lock:
+            audio = self._entries.get(key)
+            if audio is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return audio
+    
+    def put(self, key, audio):
+        """写入缓存，同时删除同一文件的过期版本"""
+        size = self._size(audio)
+        path, mtime, file_size = key[:3]
+        with self._lock:
+            for old_key in list(self._by_path.get(path, ())):
+                if old_key == key or old_key[1:3] != (mtime, file_size):
+                    if old_key != key:
+                        self.invalidations += 1
+                    self._remove(old_key)
+            if size > self.max_bytes:
+                return audio
+            self._entries[key] = audio
+            self._by_path.setdefault(path, set()).add(key)
+            self._bytes += size
+            # 超出内存限制时淘汰最久未使用的条目
+            while self._bytes > self.max_bytes and self._entries:
+                evicted_key = next(iter(self._entries))
+                self._remove(evicted_key)
+                self.evictions += 1
+        return audio
+    
+    def _remove(self, key):
+        audio = self._entries.pop(key, None)
+        if audio is not None:
+            self._bytes -= self._size(audio)
+        keys = self._by_path.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_path[key[0]]
+    
+    def invalidate(self, file_path):
+        """删除某个文件的所有解码结果"""
+        path = os.path.abspath(file_path)
+        with self._lock:
+            for key in list(self._by_path.get(path, ())):
+                self._remove(key)
+                self.invalidations += 1
+    
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._by_path.clear()
+            self._bytes = 0
+    
+    @property
+    def memory_bytes(self):
+        return self._bytes
+    
+    def stats(self):
+        """返回命中统计和内存占用"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries),
+                'memory_bytes': self._bytes,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,143 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+import numpy as np
+from utils.file_utils import write_atomic
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+
+
+class SampleStore:
+    """
+    磁盘上的float32样本库：每个样本解码一次后保存为 .npy，之后以只读内存映射读取
+    
+    文件名由源文件的绝对路径、修改时间、大小、采样率和声道数哈希得到，
+    查找时直接检查文件是否存在，不依赖清单；清单（manifest.json）记录每个源文件
+    当前对应的 .npy，用于删除源文件修改后留下的旧版本。
+    多个进程映射同一个 .npy 时共享操作系统页缓存，不重复占用内存。
+    """
+    
+    def __init__(self, store_dir, sample_rate=44100, channels=1):
+        self.store_dir = store_dir
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(store_dir, exist_ok=True)
+    
+    @property
+    def manifest_path(self):
+        return os.path.join(self.store_dir, MANIFEST_NAME)
+    
+    def entry_name(self, file_path):
+        """根据源文件当前状态生成 .npy 文件名，文件不存在时抛出 OSError"""
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size, int(self.sample_rate), int(self.channels))
+        return hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest() + '.npy'
+    
+    def load_manifest(self):
+        """读取清单 {源文件绝对路径: 条目信息}，不存在或损坏时返回空字典"""
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"读取样本库清单失败: {str(e)}")
+            return {}
+    
+    def get(self, file_path, decode):
+        """
+        返回样本的只读float32内存映射
+        
+        参数:
+            file_path: 源音频文件
+            decode: 未命中时调用 decode(file_path)，返回目标采样率、单声道的float32数组
+        """
+        name = self.entry_name(file_path)
+        path = os.path.join(self.store_dir, name)
+        try:
+            samples = np.load(path, mmap_mode='r')
+            with self._lock:
+                self.hits += 1
+            return samples
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"读取样本库文件失败，重新解码: {str(e)}")
+        
+        with self._lock:
+            self.misses += 1
+        samples = np.ascontiguousarray(decode(file_path), dtype=np.float32)
+        write_atomic(path, lambda f: np.save(f, samples))
+        self._update_manifest(file_path, name, len(samples))
+        return np.load(path, mmap_mode='r')
+    
+    def _update_manifest(self, file_path, name, frames):
+        """记录源文件的新条目，并删除它的旧版本"""
+        source = os.path.abspath(file_path)
+        with self._lock:
+            manifest = self.load_manifest()
+            old = manifest.get(source)
+            if old and old['file'] != name:
+                try:
+                    os.remove(os.path.join(self.store_dir, old['file']))
+                except FileNotFoundError:
+                    pass
+            manifest[source] = {
+                'file': name,
+                'frames': frames,
+                'sample_rate': self.sample_rate,
+                'channels': self.channels
+            }
+            text = json.dumps(manifest, indent=2, ensure_ascii=False).encode('utf-8')
+            try:
+                write_atomic(self.manifest_path, lambda f: f.write(text))
+            except Exception as e:
+                logger.warning(f"写入样本库清单失败: {str(e)}")
+    
+    def prune(self):
+        """删除清单中源文件已不存在的条目以及未被清单引用的 .npy，返回删除的文件数"""
+        removed = 0
+        with self._lock:
+            manifest = self.load_manifest()
+            for source in [source for source in manifest if not os.path.exists(source)]:
+                del manifest[source]
+            referenced = {entry['file'] for entry in manifest.values()}
+            for name in os.listdir(self.store_dir):
+                if name.endswith('.npy') and name not in referenced:
+                    try:
+                        os.remove(os.path.join(self.store_dir, name))
+                        removed += 1
+                    except FileNotFoundError:
+                        pass
+            text = json.dumps(manifest, indent=2, ensure_ascii=False).encode('utf-8')
+            write_atomic(self.manifest_path, lambda f: f.write(text))
+        return removed
+    
+    def stats(self):
+        """返回命中统计和磁盘占用"""
+        disk_bytes = 0
+        files = 0
+        for name in os.listdir(self.store_dir):
+            if name.endswith('.npy'):
+                try:
+                    disk_bytes += os.path.getsize(os.path.join(self.store_dir, name))
+                    files += 1
+                except FileNotFoundError:
+                    pass
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'files': files,
+                'disk_bytes': disk_bytes,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,51 @@
+import numpy as np
+
+DEFAULT_TEMPO = 500000  # 默认tempo (120 BPM)，单位：微秒/拍
+
+
+class TempoMap:
+    """
+    速度表：记录每次 set_tempo 的 tick 位置和累计微秒数
+    
+    tick 转换为时间时用 np.searchsorted 查找所在速度区间，批量转换为 O(n log t)。
+    """
+    
+    def __init__(self, ticks_per_beat, tempo_changes=()):
+        """
+        参数:
+            ticks_per_beat: 每拍 tick 数
+            tempo_changes: (绝对tick, tempo) 序列，顺序任意
+        """
+        self.ticks_per_beat = ticks_per_beat
+        
+        # 按 tick 排序（稳定排序），同一 tick 的多次变化以最后一次为准
+        changes = {}
+        for tick, tempo in sorted(tempo_changes, key=lambda change: change[0]):
+            changes[int(tick)] = int(tempo)
+        if 0 not in changes:
+            changes[0] = DEFAULT_TEMPO
+        ticks = sorted(changes)
+        
+        self.ticks = np.array(ticks, dtype=np.int64)
+        self.tempos = np.array([changes[tick] for tick in ticks], dtype=np.float64)
+        
+        # 每个断点处的累计微秒数
+        segment_us = np.diff(self.ticks) * self.tempos[:-1] / ticks_per_beat
+        self.microseconds = np.concatenate(([0.0], np.cumsum(segment_us)))
+    
+    def __len__(self):
+        return len(self.ticks)
+    
+    def to_seconds(self, ticks):
+        """将 tick（标量或数组）转换为秒"""
+        ticks = np.asarray(ticks, dtype=np.float64)
+        index = np.searchsorted(self.ticks, ticks, side='right') - 1
+        index = np.clip(index, 0, len(self.ticks) - 1)
+        microseconds = (self.microseconds[index]
+                        + (ticks - self.ticks[index]) * self.tempos[index] / self.ticks_per_beat)
+        return microseconds / 1_000_000
+    
+    def tempo_at(self, tick):
+        """返回指定 tick 处生效的 tempo"""
+        index = max(int(np.searchsorted(self.ticks, tick, side='right')) - 1, 0)
+        return int(self.tempos[index])
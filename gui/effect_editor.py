@@ -78,7 +78,7 @@ class EffectEditorWidget(QWidget):
         
         # 检查是否有音符
         if hasattr(self.main_window, 'project') and hasattr(self.main_window.project, 'notes') and self.main_window.project.notes:
-            unique_notes = sorted(set(note['note'] for note in self.main_window.project.notes))
+            unique_notes = self.main_window.project.notes.unique('note').tolist()
             for note in unique_notes:
                 self.note_combo.addItem(str(note), note)
             
@@ -1,21 +1,30 @@
 #main_window.py
 import os
 import sys
+import sqlite3
 import logging
 from PyQt5.QtWidgets import (
     QMainWindow, QFileDialog, QMessageBox, QAction, QDockWidget, QTabWidget, 
-    QStatusBar, QLabel, QDialog, QVBoxLayout, QApplication
+    QStatusBar, QLabel, QDialog, QVBoxLayout, QProgressBar, QPushButton
 )
 from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QIcon, QPixmap
 from .piano_roll import PianoRollWidget
 from .sample_library import SampleLibraryWidget
 from .effect_editor import EffectEditorWidget
+from .render_worker import RenderWorker
 from core.midi_processor import MidiProcessor
 from core.audio_processor import AudioProcessor
+from core.library_loader import LibraryLoader
+from core.library_index import LibraryIndex
+from core.playback import PlaybackEngine, default_sink, STATE_PLAYING
+from core.render_job import RenderJob, JOB_DONE, JOB_FAILED, JOB_CANCELLED
+from core.export import SUBTYPE_PCM_16, SUBTYPE_PCM_24, SUBTYPE_FLOAT
 from core.project import Project
+from core.note_table import NoteTable
 import tempfile
 import platform
+import subprocess
 
 logger = logging.getLogger(__name__)
 
@@ -29,7 +38,33 @@ class MainWindow(QMainWindow):
         self.project = Project()
         self.midi_processor = MidiProcessor()
         self.audio_processor = AudioProcessor()
+        # 后台扫描和解码样本，界面无需等待
+        self.library_loader = LibraryLoader(self.audio_processor)
+        # 持久化的样本库索引，重新扫描时只分析变化的文件
+        # 主目录只读、不存在或数据库被锁定时禁用索引搜索，不影响启动
+        try:
+            self.library_index = LibraryIndex(
+                os.path.join(os.path.expanduser('~'), '.skipaudiomaker', 'library.sqlite')
+            )
+        except (OSError, sqlite3.Error) as e:
+            logger.error(f"打开样本库索引失败: {str(e)}")
+            self.library_index = None
         self.current_audio_path = None
+        # 实时播放引擎，没有可用的声卡后端（sounddevice）时退回到外部播放器
+        sink = default_sink(self.audio_processor.sample_rate)
+        self.playback = PlaybackEngine(self.audio_processor, sink) if sink is not None else None
+        self.player_process = None
+        # 后台渲染线程，导出任务排队执行，渲染时可以继续编辑
+        # 使用独立的 AudioProcessor，与界面线程共享移调和样本缓存
+        self.render_worker = RenderWorker(AudioProcessor(
+            self.audio_processor.sample_rate,
+            pitch_cache=self.audio_processor.pitch_cache,
+            workers=self.audio_processor.workers,
+            quality=self.audio_processor.quality,
+            sample_cache=self.audio_processor.sample_cache,
+            sample_store=self.audio_processor.sample_store
+        ), self)
+        self.preview_job = None  # 没有声卡后端时用于外部播放器的渲染任务
         
         # 创建UI
         self.init_ui()
@@ -135,6 +170,24 @@ class MainWindow(QMainWindow):
         self.memory_timer = QTimer(self)
         self.memory_timer.timeout.connect(self.update_memory_status)
         self.memory_timer.start(5000)  # 每5秒更新一次
+        
+        # 播放进度
+        self.playback_timer = QTimer(self)
+        self.playback_timer.timeout.connect(self.update_playback_status)
+        
+        # 后台渲染进度和取消按钮，只在有任务时显示
+        self.render_progress = QProgressBar()
+        self.render_progress.setMaximumWidth(200)
+        self.render_progress.setVisible(False)
+        self.statusbar.addPermanentWidget(self.render_progress)
+        self.cancel_render_button = QPushButton("取消渲染")
+        self.cancel_render_button.setVisible(False)
+        self.cancel_render_button.clicked.connect(self.render_worker.cancel_current)
+        self.statusbar.addPermanentWidget(self.cancel_render_button)
+        
+        self.render_worker.job_started.connect(self.on_render_started)
+        self.render_worker.job_progress.connect(self.on_render_progress)
+        self.render_worker.job_finished.connect(self.on_render_finished)
     
     def update_memory_status(self):
         """更新内存状态显示"""
@@ -149,15 +202,22 @@ class MainWindow(QMainWindow):
             self.memory_label.setText("")
     
     def load_default_samples(self):
-        """加载默认样本"""
+        """在后台加载默认样本"""
         default_dir = "assets/default_samples/"
         if os.path.exists(default_dir):
-            for file in os.listdir(default_dir):
-                if file.endswith((".wav", ".mp3", ".ogg")):
-                    note_name = os.path.splitext(file)[0]
-                    file_path = os.path.join(default_dir, file)
-                    self.project.add_sample(note_name, file_path)
-                    self.sample_lib_widget.add_sample(note_name, file_path)
+            self.sample_lib_widget.load_directory(default_dir)
+    
+    def closeEvent(self, event):
+        """关闭窗口时停止后台加载"""
+        self.stop_audio()
+        self.render_worker.shutdown()
+        self.render_worker.audio_processor.close()
+        self.audio_processor.close()
+        self.sample_lib_widget.cancel_loading()
+        self.library_loader.shutdown(wait=True)
+        if self.library_index is not None:
+            self.library_index.close()
+        super().closeEvent(event)
     
     def import_midi(self):
         """导入MIDI文件"""
@@ -170,16 +230,16 @@ class MainWindow(QMainWindow):
                 self.statusbar.showMessage(f"正在加载: {file_path}")
                 
                 # 修复点1: 确保正确处理返回的notes数据结构
-                # 使用get_note_list()获取排序后的音符列表
+                # 使用get_note_list()获取按开始时间排序的音符表
                 self.midi_processor.load_midi(file_path)
                 notes = self.midi_processor.get_note_list()
                 
                 self.project.set_notes(notes)
                 
-                # 修复点2: 添加额外检查确保notes是列表
-                if not isinstance(notes, list):
+                # 修复点2: 添加额外检查确保notes是音符表
+                if not isinstance(notes, NoteTable):
                     logger.warning(f"Unexpected notes type: {type(notes)}")
-                    notes = []
+                    notes = NoteTable()
                 
                 self.piano_roll.load_notes(notes)
                 self.effect_editor_widget.update_note_list()
@@ -194,48 +254,81 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "播放错误", "没有可播放的音符")
             return
         
+        self.stop_audio()
         try:
-            self.statusbar.showMessage("正在渲染音频...")
-            QApplication.processEvents()  # 更新UI
-            
             # 获取样本映射
             sample_map = self.sample_lib_widget.get_sample_map(self.audio_processor)
             
             # 获取效果映射
             effect_map = self.effect_editor_widget.get_effect_map()
             
-            # 渲染音轨
-            track = self.audio_processor.render_track(
-                self.project.get_note_list(),
-                sample_map,
-                effect_map
-            )
+            if self.playback is not None:
+                # 边渲染边播放，第一块渲染完成即开始输出
+                self.playback.play(self.project.get_note_list(), sample_map, effect_map)
+                self.playback_timer.start(100)
+                return
             
-            # 保存临时文件并播放
+            # 在后台渲染到临时文件，完成后交给系统播放器
             with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmpfile:
                 self.current_audio_path = tmpfile.name
-                track.export(self.current_audio_path, format="wav")
-            
-            self.statusbar.showMessage("正在播放...按停止键结束播放")
-            # 在实际应用中，这里应该使用QMediaPlayer播放音频
-            # 这里简化处理，使用系统默认播放器
-            if platform.system() == 'Windows':
-                os.startfile(self.current_audio_path)
-            elif platform.system() == 'Darwin':
-                os.system(f"afplay '{self.current_audio_path}' &")
-            else:
-                os.system(f"aplay '{self.current_audio_path}' &")
-                
+            self.preview_job = self.render_worker.submit(RenderJob(
+                self.current_audio_path,
+                self.project.get_note_list(),
+                sample_map,
+                effect_map,
+                preview=True
+            ))
+        
         except Exception as e:
             QMessageBox.critical(self, "渲染错误", f"音频渲染失败:\n{str(e)}")
             logger.error(f"音频渲染失败: {str(e)}", exc_info=True)  # 添加详细错误信息
-        finally:
             self.statusbar.showMessage("就绪")
     
+    def start_external_player(self, file_path):
+        """用系统播放器播放渲染好的文件"""
+        if platform.system() == 'Windows':
+            os.startfile(file_path)
+        else:
+            player = 'afplay' if platform.system() == 'Darwin' else 'aplay'
+            self.player_process = subprocess.Popen([player, file_path])
+        self.statusbar.showMessage("正在播放...按停止键结束播放")
+    
+    def remove_preview_file(self, file_path):
+        """删除取消或失败的试听任务留下的临时文件"""
+        if file_path == self.current_audio_path:
+            self.current_audio_path = None
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"删除临时文件失败: {str(e)}")
+    
+    def update_playback_status(self):
+        """显示播放位置，播放结束后停止刷新"""
+        if self.playback is None or self.playback.state != STATE_PLAYING:
+            self.playback_timer.stop()
+            self.statusbar.showMessage("就绪")
+            return
+        stats = self.playback.stats()
+        position = stats['position_sec']
+        message = f"正在播放 {int(position // 60)}:{position % 60:04.1f}"
+        if stats['underruns']:
+            message += f"（欠载 {stats['underruns']} 次）"
+        self.statusbar.showMessage(message)
+    
     def stop_audio(self):
         """停止播放"""
-        # 在实际应用中需要停止播放器
-        # 这里简化处理，只更新状态
+        if self.playback is not None:
+            self.playback.stop()
+            self.playback_timer.stop()
+        if self.preview_job is not None:
+            self.preview_job.cancel()
+            self.preview_job = None
+        if self.player_process is not None:
+            if self.player_process.poll() is None:
+                self.player_process.terminate()
+            self.player_process = None
         self.statusbar.showMessage("播放停止")
     
     def export_audio(self):
@@ -244,17 +337,23 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "导出错误", "没有可导出的音符")
             return
         
-        file_path, _ = QFileDialog.getSaveFileName(
-            self, "导出音频", "", "音频文件 (*.wav)"
+        # 文件类型 -> (扩展名, 采样格式)
+        export_types = {
+            "WAV 16位 (*.wav)": ('.wav', SUBTYPE_PCM_16),
+            "WAV 24位 (*.wav)": ('.wav', SUBTYPE_PCM_24),
+            "WAV 32位浮点 (*.wav)": ('.wav', SUBTYPE_FLOAT),
+            "FLAC 16位 (*.flac)": ('.flac', SUBTYPE_PCM_16),
+            "FLAC 24位 (*.flac)": ('.flac', SUBTYPE_PCM_24),
+        }
+        file_path, selected_type = QFileDialog.getSaveFileName(
+            self, "导出音频", "", ";;".join(export_types)
         )
         
         if file_path:
             try:
-                if not file_path.endswith('.wav'):
-                    file_path += '.wav'
-                
-                self.statusbar.showMessage("正在渲染音频...")
-                QApplication.processEvents()  # 更新UI
+                extension, subtype = export_types.get(selected_type, ('.wav', SUBTYPE_PCM_16))
+                if not file_path.lower().endswith(extension):
+                    file_path += extension
                 
                 # 获取样本映射
                 sample_map = self.sample_lib_widget.get_sample_map(self.audio_processor)
@@ -262,22 +361,73 @@ class MainWindow(QMainWindow):
                 # 获取效果映射
                 effect_map = self.effect_editor_widget.get_effect_map()
                 
-                # 渲染音轨
-                track = self.audio_processor.render_track(
+                # 加入后台渲染队列，任务创建时保存音符和效果的快照，之后可以继续编辑
+                self.render_worker.submit(RenderJob(
+                    file_path,
                     self.project.get_note_list(),
                     sample_map,
-                    effect_map
+                    effect_map,
+                    subtype=subtype
+                ))
+                pending = len(self.render_worker.pending_jobs)
+                self.statusbar.showMessage(
+                    f"已加入导出队列: {os.path.basename(file_path)}（等待中 {pending} 个）"
                 )
-                
-                # 导出音频
-                track.export(file_path, format="wav")
-                self.statusbar.showMessage(f"成功导出: {os.path.basename(file_path)}")
-                
+            
             except Exception as e:
                 QMessageBox.critical(self, "导出错误", f"导出失败:\n{str(e)}")
                 logger.error(f"音频导出失败: {str(e)}", exc_info=True)  # 添加详细错误信息
-            finally:
-                self.statusbar.showMessage("就绪")
+    
+    def on_render_started(self, job):
+        """后台渲染任务开始"""
+        self.render_progress.setRange(0, max(job.total, 1))
+        self.render_progress.setValue(0)
+        self.render_progress.setVisible(True)
+        self.cancel_render_button.setVisible(True)
+    
+    def on_render_progress(self, job, done, total, eta):
+        """更新渲染进度和剩余时间"""
+        # 先按组合数显示样本库进度，之后按音符数显示混音进度
+        self.render_progress.setRange(0, max(total, 1))
+        self.render_progress.setValue(done)
+        name = os.path.basename(job.file_path)
+        if job.rendering_bank:
+            message = f"正在渲染 {name}: 移调样本 {job.pairs_done}/{job.total_pairs}"
+        else:
+            message = f"正在渲染 {name}: {job.notes_done}/{job.total_notes} 个音符"
+        if eta is not None:
+            message += f"，剩余约 {eta:.0f} 秒"
+        pending = len(self.render_worker.pending_jobs)
+        if pending:
+            message += f"，队列中还有 {pending} 个"
+        self.statusbar.showMessage(message)
+    
+    def on_render_finished(self, job):
+        """后台渲染任务结束"""
+        if not self.render_worker.busy:
+            self.render_progress.setVisible(False)
+            self.cancel_render_button.setVisible(False)
+        
+        if job.preview:
+            if job is self.preview_job:
+                self.preview_job = None
+            # 渲染完最后一个音符后才取消的试听也会以完成状态结束，同样不再播放
+            if job.state == JOB_DONE and not job.cancelled:
+                self.start_external_player(job.file_path)
+                return
+            self.remove_preview_file(job.file_path)
+            if job.state == JOB_FAILED:
+                QMessageBox.critical(self, "渲染错误", f"音频渲染失败:\n{job.error}")
+            return
+        
+        name = os.path.basename(job.file_path)
+        if job.state == JOB_DONE:
+            self.statusbar.showMessage(f"成功导出: {name}（用时 {job.elapsed:.1f} 秒）")
+        elif job.state == JOB_CANCELLED:
+            self.statusbar.showMessage(f"已取消导出: {name}")
+        elif job.state == JOB_FAILED:
+            self.statusbar.showMessage(f"导出失败: {name}")
+            QMessageBox.critical(self, "导出错误", f"导出失败:\n{job.error}")
     
     def show_about(self):
         """显示关于对话框"""
@@ -4,13 +4,14 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt, QRectF
 from PyQt5.QtGui import QColor, QPainter, QPen, QBrush, QFont
+from core.note_table import as_note_table
 
 logger = logging.getLogger(__name__)
 
 class PianoRollWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.notes = []
+        self.notes = as_note_table([])
         self.init_ui()
     
     def init_ui(self):
@@ -32,20 +33,18 @@ class PianoRollWidget(QWidget):
     
     def load_notes(self, notes):
         """加载音符数据"""
-        self.notes = notes
+        self.notes = as_note_table(notes)
         self.scene.clear()
         
-        if not notes:
+        if not len(self.notes):
             return
         
         # 计算时间范围
-        min_time = min(note['start_sec'] for note in self.notes)
-        max_time = max(note['end_sec'] for note in self.notes)
+        min_time, max_time = self.notes.time_range()
         time_range = max_time - min_time
         
         # 计算音高范围
-        min_note = min(note['note'] for note in self.notes)
-        max_note = max(note['note'] for note in self.notes)
+        min_note, max_note = self.notes.pitch_range()
         note_range = max_note - min_note + 1
         
         # 设置场景大小
@@ -54,14 +53,15 @@ class PianoRollWidget(QWidget):
         # 绘制网格
         self.draw_grid(min_time, max_time, min_note, max_note)
         
+        # 批量计算位置和大小
+        xs = (self.notes['start_sec'] - min_time) * 200
+        ys = (max_note - self.notes['note'].astype(int)) * 30
+        widths = (self.notes['end_sec'] - self.notes['start_sec']) * 200
+        height = 28
+        
         # 绘制音符
-        for note in self.notes:
-            # 计算位置和大小
-            x = (note['start_sec'] - min_time) * 200
-            y = (max_note - note['note']) * 30
-            width = (note['end_sec'] - note['start_sec']) * 200
-            height = 28
-            
+        for x, y, width, pitch in zip(xs.tolist(), ys.tolist(), widths.tolist(),
+                                      self.notes['note'].tolist()):
             # 创建矩形项
             rect = QGraphicsRectItem(x, y, width, height)
             rect.setBrush(QColor(70, 130, 180))  # 钢蓝色
@@ -69,7 +69,7 @@ class PianoRollWidget(QWidget):
             self.scene.addItem(rect)
             
             # 添加标签
-            note_name = self.get_note_name(note['note'])
+            note_name = self.get_note_name(pitch)
             
             # 仅在音符足够宽时显示标签
             if width > 30:
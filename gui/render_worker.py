@@ -0,0 +1,101 @@
+import queue
+import logging
+import threading
+from PyQt5.QtCore import QThread, pyqtSignal
+from core.render_job import RenderCancelled, JOB_CANCELLED
+
+logger = logging.getLogger(__name__)
+
+class RenderWorker(QThread):
+    """
+    后台渲染线程：按提交顺序依次执行 RenderJob
+    
+    信号从渲染线程发出，连接到界面对象的槽时自动转到主线程执行。
+    """
+    job_started = pyqtSignal(object)  # RenderJob
+    job_progress = pyqtSignal(object, int, int, object)  # 任务, 当前阶段已完成数, 当前阶段总数, 剩余秒数或None
+    job_finished = pyqtSignal(object)  # 任务结束（state 为 done、failed 或 cancelled）
+    queue_changed = pyqtSignal(int)  # 等待中的任务数
+    
+    def __init__(self, audio_processor, parent=None):
+        super().__init__(parent)
+        self.audio_processor = audio_processor
+        self.current_job = None
+        self._queue = queue.Queue()
+        self._pending = []  # 等待中的任务，用于显示和取消
+        self._lock = threading.Lock()
+    
+    @property
+    def pending_jobs(self):
+        with self._lock:
+            return list(self._pending)
+    
+    @property
+    def busy(self):
+        return self.current_job is not None or bool(self.pending_jobs)
+    
+    def submit(self, job):
+        """加入队列，立即返回"""
+        with self._lock:
+            self._pending.append(job)
+            pending = len(self._pending)
+        self._queue.put(job)
+        self.queue_changed.emit(pending)
+        if not self.isRunning():
+            self.start()
+        return job
+    
+    def cancel_current(self):
+        """取消正在渲染的任务"""
+        job = self.current_job
+        if job is not None:
+            job.cancel()
+    
+    def cancel_all(self):
+        """取消正在渲染和等待中的所有任务"""
+        with self._lock:
+            jobs = self._pending + [self.current_job]
+        for job in jobs:
+            if job is not None:
+                job.cancel()
+    
+    def shutdown(self):
+        """取消所有任务并等待线程退出"""
+        self.cancel_all()
+        self._queue.put(None)
+        self.wait()
+    
+    def run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            # 在同一把锁内从等待列表移到当前任务，cancel_all 不会漏掉它
+            with self._lock:
+                if job in self._pending:
+                    self._pending.remove(job)
+                pending = len(self._pending)
+                self.current_job = job
+            self.queue_changed.emit(pending)
+            
+            if job.cancelled:
+                job.state = JOB_CANCELLED
+                self.current_job = None
+                self.job_finished.emit(job)
+                continue
+            
+            self.job_started.emit(job)
+            try:
+                job.run(
+                    self.audio_processor,
+                    on_progress=lambda job: self.job_progress.emit(
+                        job, job.done, job.total, job.eta
+                    )
+                )
+            except RenderCancelled:
+                logger.info(f"渲染已取消: {job.file_path}")
+            except Exception as e:
+                logger.error(f"后台渲染失败: {str(e)}")
+            finally:
+                self.current_job = None
+                self.job_finished.emit(job)
@@ -2,17 +2,26 @@ import os
 import logging
 from PyQt5.QtWidgets import (
     QWidget, QListWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
-    QFileDialog, QListWidgetItem, QMessageBox, QLabel
+    QFileDialog, QListWidgetItem, QMessageBox, QLabel, QLineEdit
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QObject, pyqtSignal
 from PyQt5.QtGui import QIcon
 
 logger = logging.getLogger(__name__)
 
+INDEX_RESULT_LIMIT = 200  # 索引搜索最多显示的结果数
+
+class LibraryLoadSignals(QObject):
+    """把后台加载线程的回调转发到界面线程"""
+    sample_ready = pyqtSignal(str, str)  # 音符名, 文件路径
+    progress = pyqtSignal(int, int)  # 已完成数, 总数
+    finished = pyqtSignal(object)  # LibraryLoadTask
+
 class SampleLibraryWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.main_window = parent
+        self.load_tasks = []  # 进行中的后台加载任务
         self.init_ui()
     
     def init_ui(self):
@@ -38,6 +47,11 @@ class SampleLibraryWidget(QWidget):
         self.add_button.clicked.connect(self.add_sample)
         button_layout.addWidget(self.add_button)
         
+        # 添加文件夹按钮
+        self.add_folder_button = QPushButton("添加文件夹")
+        self.add_folder_button.clicked.connect(self.add_folder)
+        button_layout.addWidget(self.add_folder_button)
+        
         # 移除样本按钮
         self.remove_button = QPushButton("移除")
         self.remove_button.setIcon(QIcon('assets/icons/toolbar/remove.png'))
@@ -45,6 +59,22 @@ class SampleLibraryWidget(QWidget):
         button_layout.addWidget(self.remove_button)
         
         layout.addLayout(button_layout)
+        
+        # 样本库索引搜索，双击结果添加到项目
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("搜索已索引的样本")
+        self.search_edit.textChanged.connect(self.refresh_index_results)
+        layout.addWidget(self.search_edit)
+        
+        self.index_list = QListWidget()
+        self.index_list.itemDoubleClicked.connect(self.add_index_result)
+        layout.addWidget(self.index_list)
+        
+        if self.main_window.library_index is None:
+            # 索引数据库无法打开时只禁用搜索，样本库其他功能照常使用
+            self.search_edit.setPlaceholderText("样本库索引不可用")
+            self.search_edit.setEnabled(False)
+            self.index_list.setEnabled(False)
     
     def add_sample(self, note_name=None, file_path=None):
         """添加样本到库中"""
@@ -68,6 +98,122 @@ class SampleLibraryWidget(QWidget):
             item.setData(Qt.UserRole, file_path)
             self.sample_list.addItem(item)
     
+    def add_folder(self):
+        """选择文件夹并在后台加载其中的样本"""
+        directory = QFileDialog.getExistingDirectory(self, "选择样本文件夹")
+        if directory:
+            reply = QMessageBox.question(
+                self, "添加文件夹", "是否包含子文件夹中的样本？",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+            )
+            self.load_directory(directory, recursive=reply == QMessageBox.Yes)
+            if self.main_window.library_index is not None:
+                self.index_directory(directory, recursive=reply == QMessageBox.Yes)
+    
+    def load_directory(self, directory, recursive=False):
+        """
+        在后台扫描并解码目录中的样本，立即返回
+        
+        每个样本解码完成后加入列表，播放或导出时直接使用已解码的缓存。
+        """
+        signals = LibraryLoadSignals(self)
+        signals.sample_ready.connect(self.add_sample)
+        signals.progress.connect(self.on_load_progress)
+        signals.finished.connect(self.on_load_finished)
+        
+        project = self.main_window.project
+        task = self.main_window.library_loader.load_directory(
+            directory,
+            recursive,
+            on_sample=lambda note_name, file_path, sample: signals.sample_ready.emit(note_name, file_path),
+            on_progress=signals.progress.emit,
+            on_finished=signals.finished.emit
+        )
+        # 样本按解码完成顺序加入，记录加载前是否已有默认样本，结束后按文件名确定默认样本
+        task.had_default = project.default_sample is not None
+        self.load_tasks.append(task)
+        return task
+    
+    def on_load_progress(self, done, total):
+        """更新加载进度"""
+        if total:
+            self.main_window.statusbar.showMessage(f"正在加载样本: {done}/{total}")
+    
+    def on_load_finished(self, task):
+        """后台加载结束"""
+        if task in self.load_tasks:
+            self.load_tasks.remove(task)
+        project = self.main_window.project
+        if task.loaded and not task.had_default:
+            project.default_sample = min(file_path for _, file_path in task.loaded)
+        message = f"样本加载完成: {len(task.loaded)} 个"
+        if task.failed:
+            message += f"，{len(task.failed)} 个失败"
+        self.main_window.statusbar.showMessage(message)
+    
+    def index_directory(self, directory, recursive=True):
+        """在后台增量更新目录的样本库索引，结束后刷新搜索结果"""
+        signals = LibraryLoadSignals(self)
+        signals.progress.connect(self.on_index_progress)
+        signals.finished.connect(self.on_index_finished)
+        
+        task = self.main_window.library_loader.index_directory(
+            self.main_window.library_index,
+            directory,
+            recursive,
+            on_progress=signals.progress.emit,
+            on_finished=signals.finished.emit
+        )
+        self.load_tasks.append(task)
+        return task
+    
+    def on_index_progress(self, done, total):
+        """更新索引进度"""
+        if total:
+            self.main_window.statusbar.showMessage(f"正在索引样本: {done}/{total}")
+    
+    def on_index_finished(self, task):
+        """索引更新结束"""
+        if task in self.load_tasks:
+            self.load_tasks.remove(task)
+        if task.result:
+            stats = task.result
+            self.main_window.statusbar.showMessage(
+                f"样本索引已更新: 新增 {stats['added']}，更新 {stats['updated']}，"
+                f"删除 {stats['removed']}，未变化 {stats['unchanged']}"
+            )
+        self.refresh_index_results()
+    
+    def refresh_index_results(self):
+        """按搜索框内容查询样本库索引"""
+        self.index_list.clear()
+        text = self.search_edit.text().strip()
+        if not text:
+            return
+        try:
+            rows = self.main_window.library_index.query(text=text, limit=INDEX_RESULT_LIMIT)
+        except Exception as e:
+            logger.error(f"查询样本索引失败: {str(e)}")
+            return
+        for row in rows:
+            label = row['name']
+            if row['root_pitch'] is not None:
+                label += f"  [{self.main_window.piano_roll.get_note_name(row['root_pitch'])}]"
+            label += f"  {row['duration']:.2f}s"
+            item = QListWidgetItem(label)
+            item.setData(Qt.UserRole, row['path'])
+            item.setData(Qt.UserRole + 1, row['name'])
+            self.index_list.addItem(item)
+    
+    def add_index_result(self, item):
+        """将索引搜索结果添加到项目"""
+        self.add_sample(item.data(Qt.UserRole + 1), item.data(Qt.UserRole))
+    
+    def cancel_loading(self):
+        """取消所有进行中的后台加载"""
+        for task in self.load_tasks:
+            task.cancel()
+    
     def remove_sample(self):
         """从库中移除样本"""
         selected = self.sample_list.currentRow()
@@ -91,4 +237,9 @@ class SampleLibraryWidget(QWidget):
                 self.main_window.project.default_sample
             )
         
+        stats = audio_processor.sample_cache.stats()
+        logger.debug(
+            f"样本缓存: {stats['entries']} 个, {stats['memory_bytes'] / 1024 / 1024:.1f} MB, "
+            f"命中率 {stats['hit_rate']:.0%}"
+        )
         return sample_map
\ No newline at end of file
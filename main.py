@@ -1,6 +1,7 @@
 import sys
 import os
 import logging
+import multiprocessing
 from PyQt5.QtWidgets import QApplication, QSplashScreen, QMessageBox
 from PyQt5.QtGui import QPixmap, QFont
 from gui.main_window import MainWindow
@@ -64,4 +65,6 @@ def main():
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
+    # 打包后的可执行文件中启动渲染工作进程需要
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,226 @@
+"""
+SkipAudioMaker 无界面批量渲染
+不导入 PyQt5 / gui，可在无显示器的服务器上运行
+
+用法:
+    python render_cli.py song.mid samples/ out.wav --effects effects.json
+    python render_cli.py song.mid samples/ out.flac --subtype PCM_24
+    python render_cli.py --jobs jobs.json --concurrency 4
+
+效果设置 JSON 以音符编号为键，格式与效果编辑器相同:
+    {"60": {"vibrato": {"rate": 5.0, "depth": 0.5}},
+     "64": {"glide": {"start": 60, "end": 67}}}
+
+批量任务 JSON 为任务列表，每个任务包含 midi、samples、output，可选 effects:
+    [{"midi": "a.mid", "samples": "pack1/", "output": "a.wav", "effects": "fx.json"}]
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from core.midi_processor import MidiProcessor
+from core.midi_cache import MidiCache
+from core.sample_cache import SampleCache
+from core.sample_store import SampleStore
+from core.audio_processor import AudioProcessor, QUALITY_MODES, QUALITY_PHASE_VOCODER
+from core.export import EXPORT_SUBTYPES, SUBTYPE_PCM_16
+from core.project import Project
+from utils.file_utils import get_audio_files_in_directory
+
+logger = logging.getLogger(__name__)
+
+def load_effects(effects):
+    """读取效果设置（文件路径或已解析的字典），键转换为音符编号"""
+    if not effects:
+        return {}
+    if isinstance(effects, str):
+        with open(effects, 'r', encoding='utf-8') as f:
+            effects = json.load(f)
+    return {int(note): settings for note, settings in effects.items()}
+
+def build_project(midi_path, sample_dir, effects=None, midi_cache=None):
+    """根据MIDI文件、样本目录和效果设置创建项目，可选使用MIDI解析缓存"""
+    project = Project()
+    
+    midi_processor = MidiProcessor(cache=midi_cache)
+    midi_processor.load_midi(midi_path)
+    project.set_notes(midi_processor.get_note_list())
+    
+    for file_path in sorted(get_audio_files_in_directory(sample_dir)):
+        note_name = os.path.splitext(os.path.basename(file_path))[0]
+        project.add_sample(note_name, file_path)
+    
+    project.effects = load_effects(effects)
+    return project
+
+def load_sample_map(project, audio_processor):
+    """
+    加载项目中的所有样本，文件名为数字时同时按音符编号映射
+    
+    处理器配置了 sample_store 时样本为共享的float32内存映射，否则为 AudioSegment。
+    """
+    if audio_processor.sample_store is not None:
+        load = audio_processor.load_sample_array
+    else:
+        load = audio_processor.load_sample
+    
+    sample_map = {}
+    for note_name, file_path in project.samples.items():
+        sample = load(file_path)
+        sample_map[note_name] = sample
+        if note_name.isdigit():
+            sample_map[int(note_name)] = sample
+    
+    # 添加默认样本
+    if 'default' not in sample_map and project.default_sample:
+        sample_map['default'] = load(project.default_sample)
+    
+    return sample_map
+
+def render_job(job, options, sample_cache=None):
+    """
+    渲染单个任务
+    
+    参数:
+        job: 包含 midi、samples、output、effects 的字典
+        options: 渲染选项（sample_rate、quality、workers、block_size、subtype、profile、
+                 midi_cache、midi_cache_bytes、sample_store）
+        sample_cache: 可选的 SampleCache，多个任务共用同一样本库时避免重复解码
+    
+    返回:
+        渲染结果摘要字典
+    """
+    start = time.perf_counter()
+    midi_cache = None
+    if options.get('midi_cache'):
+        midi_cache = MidiCache(options['midi_cache'], options['midi_cache_bytes'])
+    project = build_project(job['midi'], job['samples'], job.get('effects'), midi_cache)
+    audio_processor = AudioProcessor(
+        options['sample_rate'],
+        workers=options['workers'],
+        quality=options['quality'],
+        sample_cache=sample_cache,
+        sample_store=SampleStore(options['sample_store'], options['sample_rate'])
+        if options.get('sample_store') else None
+    )
+    sample_map = load_sample_map(project, audio_processor)
+    
+    output_dir = os.path.dirname(os.path.abspath(job['output']))
+    os.makedirs(output_dir, exist_ok=True)
+    try:
+        with audio_processor.profiling() as profiler:
+            frames = audio_processor.render_to_file(
+                job['output'],
+                project.get_note_list(),
+                sample_map,
+                project.effects,
+                options['block_size'],
+                options.get('subtype', SUBTYPE_PCM_16)
+            )
+    finally:
+        audio_processor.close()
+    if options.get('profile'):
+        profiler.to_json(os.path.splitext(job['output'])[0] + '.profile.json')
+    return {
+        'output': job['output'],
+        'notes': len(project.notes),
+        'samples': len(project.samples),
+        'duration_sec': frames / options['sample_rate'],
+        'render_sec': time.perf_counter() - start
+    }
+
+def load_jobs(args):
+    """从命令行参数或任务文件中读取任务列表"""
+    if args.jobs:
+        with open(args.jobs, 'r', encoding='utf-8') as f:
+            jobs = json.load(f)
+        for job in jobs:
+            job.setdefault('effects', args.effects)
+        return jobs
+    
+    if not (args.midi and args.samples and args.output):
+        raise ValueError("需要提供 MIDI 文件、样本目录和输出路径，或使用 --jobs 指定任务文件")
+    return [{
+        'midi': args.midi,
+        'samples': args.samples,
+        'output': args.output,
+        'effects': args.effects
+    }]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="SkipAudioMaker 无界面批量渲染")
+    parser.add_argument('midi', nargs='?', help="MIDI 文件路径")
+    parser.add_argument('samples', nargs='?', help="样本目录")
+    parser.add_argument('output', nargs='?', help="输出路径（.wav 或 .flac）")
+    parser.add_argument('--effects', help="效果设置 JSON 文件")
+    parser.add_argument('--jobs', help="批量任务 JSON 文件")
+    parser.add_argument('--concurrency', type=int, default=1, help="同时渲染的任务数")
+    parser.add_argument('--workers', type=int, default=1, help="每个任务的音符渲染进程数")
+    parser.add_argument('--quality', choices=QUALITY_MODES, default=QUALITY_PHASE_VOCODER,
+                        help="移调质量模式")
+    parser.add_argument('--sample-rate', type=int, default=44100, help="输出采样率")
+    parser.add_argument('--block-size', type=int, default=65536, help="流式渲染块大小（采样数）")
+    parser.add_argument('--subtype', choices=EXPORT_SUBTYPES, default=SUBTYPE_PCM_16,
+                        help="输出采样格式（FLAC 不支持 FLOAT）")
+    parser.add_argument('--midi-cache', help="MIDI 解析缓存目录（重复渲染同一 MIDI 时跳过解析）")
+    parser.add_argument('--midi-cache-size', type=int, default=64, help="MIDI 解析缓存容量上限（MB）")
+    parser.add_argument('--sample-store', help="float32 样本库目录：样本只解码一次，多个渲染进程共享内存映射")
+    parser.add_argument('--profile', action='store_true',
+                        help="为每个输出额外写入 <输出名>.profile.json 分阶段性能报告")
+    parser.add_argument('-v', '--verbose', action='store_true', help="输出调试日志")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
+    try:
+        jobs = load_jobs(args)
+    except Exception as e:
+        logger.error(f"读取任务失败: {str(e)}")
+        return 2
+    
+    options = {
+        'sample_rate': args.sample_rate,
+        'quality': args.quality,
+        'workers': args.workers,
+        'block_size': args.block_size,
+        'subtype': args.subtype,
+        'profile': args.profile,
+        'midi_cache': args.midi_cache,
+        'midi_cache_bytes': args.midi_cache_size * 1024 * 1024,
+        'sample_store': args.sample_store
+    }
+    
+    failures = 0
+    if args.concurrency > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=args.concurrency) as executor:
+            futures = {executor.submit(render_job, job, options): job for job in jobs}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    result = future.result()
+                    logger.info(f"渲染完成: {json.dumps(result, ensure_ascii=False)}")
+                except Exception as e:
+                    failures += 1
+                    logger.error(f"渲染失败 {job['midi']}: {str(e)}")
+    else:
+        sample_cache = SampleCache()
+        for job in jobs:
+            try:
+                result = render_job(job, options, sample_cache)
+                logger.info(f"渲染完成: {json.dumps(result, ensure_ascii=False)}")
+            except Exception as e:
+                failures += 1
+                logger.error(f"渲染失败 {job['midi']}: {str(e)}")
+    
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
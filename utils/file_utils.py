@@ -1,22 +1,70 @@
 import os
+import threading
 
-def get_audio_files_in_directory(directory):
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.ogg', '.flac')
+
+def get_audio_files_in_directory(directory, recursive=False):
     """
     获取目录中的所有音频文件
     
     参数:
         directory: 要扫描的目录路径
-        
+        recursive: 是否包含子目录
+    
     返回:
         音频文件路径列表
     """
-    audio_extensions = ['.wav', '.mp3', '.ogg', '.flac']
     files = []
+    if recursive:
+        for root, dirs, names in os.walk(directory):
+            dirs.sort()
+            for name in sorted(names):
+                if name.lower().endswith(AUDIO_EXTENSIONS):
+                    files.append(os.path.join(root, name))
+        return files
+    
     for file in os.listdir(directory):
-        if any(file.lower().endswith(ext) for ext in audio_extensions):
+        if file.lower().endswith(AUDIO_EXTENSIONS):
             files.append(os.path.join(directory, file))
     return files
 
+def scan_audio_files(directory, recursive=True):
+    """
+    扫描目录中的音频文件及其状态（基于 os.scandir，判断文件类型无需额外的系统调用）
+    
+    参数:
+        directory: 要扫描的目录路径
+        recursive: 是否包含子目录
+    
+    返回:
+        生成 (绝对路径, 修改时间(纳秒), 文件大小) 的迭代器，无法访问的子目录会被跳过，
+        子目录的符号链接不会跟随
+    """
+    root = os.path.abspath(directory)
+    pending = [root]
+    while pending:
+        current = pending.pop()
+        try:
+            with os.scandir(current) as entries:
+                entries = sorted(entries, key=lambda entry: entry.name)
+        except OSError:
+            # 根目录无法访问时报错，子目录直接跳过
+            if current == root:
+                raise
+            continue
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.name.lower().endswith(AUDIO_EXTENSIONS) and entry.is_file():
+                    stat = entry.stat()
+                    yield entry.path, stat.st_mtime_ns, stat.st_size
+            except OSError:
+                continue
+        if recursive:
+            pending.extend(reversed(subdirs))
+
 def ensure_directory_exists(path):
     """
     确保目录存在，如果不存在则创建
@@ -27,19 +75,39 @@ def ensure_directory_exists(path):
     if not os.path.exists(path):
         os.makedirs(path, exist_ok=True)
 
+def write_atomic(path, write):
+    """
+    先写入临时文件再替换目标文件，其他进程或线程不会读到写了一半的文件
+    
+    参数:
+        path: 目标文件路径
+        write: 写入函数 write(f)，f 为以二进制模式打开的临时文件
+    
+    临时文件名包含进程号和线程号，同一进程的多个线程同时写入同一路径也不会冲突；
+    写入或替换失败时删除临时文件并抛出原异常。
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
 def get_unique_filename(file_path):
     """
     如果文件已存在，生成唯一的文件名（通过添加数字后缀）
     
     参数:
         file_path: 原始文件路径
-        
+    
     返回:
         唯一的文件路径
     """
     if not os.path.exists(file_path):
         return file_path
-        
+    
     base, ext = os.path.splitext(file_path)
     counter = 1
     while True: